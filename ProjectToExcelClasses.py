@@ -1,5 +1,10 @@
-import win32com.client
-import win32ui
+try:
+    import win32ui
+except ImportError:
+    # only available on Windows with pywin32 installed, only needed to select the project file with a dialog box
+    win32ui = None
+import array
+import numpy as np
 import pandas as pd
 import datetime as dt
 import sys
@@ -10,49 +15,444 @@ import dateutil.parser as dt_parse
 import logging
 import logging.handlers
 import datetime as dt
+import time
+
+from dependencyGraph import DependencyGraph
+from outlineTree import OutlineTree
+from periodBucketing import PeriodBuckets
+from projectTaskSources import ComTaskSource, TaskSource, task_source_for_file
+from runMetrics import RunMetrics, set_up_logger
+from taskFilter import TaskFilter
+
+class FieldExtractionPlan(object):
+    """The per-task work needed to fill one row of the project dataframe, worked out once from the headers.
+
+    Every header is resolved up front, either to the field constant passed to Task.GetField or to a
+    dedicated collector (Resource Names are collected by iterating over Assignments and the predecessors
+    are added to the dependency graph), so extracting a task only has to execute the plan.
+    The Predecessors column is rendered by finish, naming the predecessors from the graph.
+    com_calls counts the calls made to the task source, e.g. plan.com_calls["GetField"], and metrics
+    times the field fetch and the dependency/resource collection (a RunMetrics).
+
+    The columns are typed: Start and Finish are datetime64, % Complete is a uint8 (0-100) and
+    Resource Names, like the extra headers with few distinct values, is categorical.
+    """
+    # headers filled in by flatten_tasks from the task walk itself
+    walk_headers = ("UniqueID", "SummaryTask")
+    # headers collected from the task resources and dependencies rather than read with Task.GetField
+    collected_headers = ("Resource Names", "Predecessors")
+    date_headers = ("Start", "Finish")
+    percent_headers = ("% Complete",)
+    categorical_headers = ("Resource Names",)
+    # free text headers never made categorical
+    text_headers = ("Name", "Notes", "Predecessors")
+
+    def __init__(self, headers, field_constant, predecessor_unique_ids=None, typed_fields=None, logger=None):
+        """
+        Arguments:
+            headers {list} -- List of headers using MSProject exact field names, must start with "UniqueID" and "SummaryTask"
+            field_constant {function} -- converts a field name to the constant used by Task.GetField (Application.FieldNameToFieldConstant)
+
+        Keyword Arguments:
+            predecessor_unique_ids {function} -- returns the Unique IDs of the predecessors of a task,
+                                                 e.g. TaskSource.predecessor_unique_ids (default: {None}, walks Task.TaskDependencies)
+            typed_fields {dict} -- headers read from a typed Task property rather than Task.GetField text,
+                                   e.g. TaskSource.typed_fields {"% Complete": "PercentComplete"} (default: {None})
+            logger {logging.Logger} -- logger to report to (default: {None}, uses the 'Log' logger)
+        """
+        self.headers = headers
+        self.com_calls = collections.Counter()
+        self.metrics = RunMetrics()
+        self.logger = logger if logger is not None else logging.getLogger('Log')
+        # checked once rather than building the per-task debug messages when they are not logged
+        self.__debug = self.logger.isEnabledFor(logging.DEBUG)
+        # per-task times, added to metrics by finish
+        self.__fetch_seconds = 0.0
+        self.__collect_seconds = 0.0
+        self.graph = DependencyGraph()
+        self.outline = OutlineTree()
+        # outline node of the SummaryTask of every row built, two summary tasks may share a path but not a node
+        self.summary_nodes = array.array("q")
+        # Unique IDs of the rows whose Predecessors were rendered before a predecessor had been walked
+        self.forward_references = []
+        self.__walked = set()
+        self.__row_predecessors = []
+        self.__predecessor_unique_ids = predecessor_unique_ids or TaskSource.predecessor_unique_ids
+        self.__collect_predecessors = "Predecessors" in headers
+        self.__collectors = []
+        self.__fields = []
+        self.__properties = []
+        typed_fields = typed_fields or {}
+        for head_title in headers:
+            if head_title in self.walk_headers or head_title == "Predecessors":
+                continue
+            if head_title == "Resource Names":
+                self.__collectors.append((head_title, self.__collect_resource_names))
+            elif head_title in typed_fields:
+                self.__properties.append((head_title, typed_fields[head_title]))
+            else:
+                self.__fields.append((head_title, field_constant(head_title)))
+                self.com_calls["FieldNameToFieldConstant"] += 1
+
+    def execute(self, t, unique_id, columns):
+        """appends the values of task t to the column buffers"""
+        started = time.perf_counter()
+        for head_title, constant in self.__fields:
+            columns[head_title].append(t.GetField(constant))
+        self.com_calls["GetField"] += len(self.__fields)
+        for head_title, property_name in self.__properties:
+            columns[head_title].append(getattr(t, property_name))
+        self.com_calls["Task"] += len(self.__properties)
+        fetched = time.perf_counter()
+        for head_title, collector in self.__collectors:
+            columns[head_title].append(collector(t, unique_id))
+        name = columns["Name"][-1] if "Name" in columns else t.Name
+        if self.__collect_predecessors:
+            if self.__debug:
+                self.logger.debug("Collecting Task Dependencies for %s", unique_id)
+            predecessor_unique_ids = self.__predecessor_unique_ids(t, self.com_calls)
+            self.graph.add_task(unique_id, name, predecessor_unique_ids)
+            self.__row_predecessors.append([p for p in predecessor_unique_ids if p != unique_id])
+        else:
+            self.graph.add_task(unique_id, name)
+        self.__walked.add(unique_id)
+        self.__fetch_seconds += fetched - started
+        self.__collect_seconds += time.perf_counter() - fetched
+
+    @property
+    def calls_per_task(self):
+        """returns the number of calls execute makes per task, at least (a collector makes one more per item collected)"""
+        return len(self.__fields) + len(self.__properties) + len(self.__collectors) + self.__collect_predecessors
+
+    def add_task_name(self, unique_id, name):
+        """adds a task that is not output (summary or ignored task) to the dependency graph, so it can be named as a predecessor"""
+        self.graph.add_task(unique_id, name)
+        self.__walked.add(unique_id)
+
+    def finish(self, columns):
+        """fills in the columns rendered once all the tasks have been extracted and types the columns"""
+        self.metrics.add_time("field fetch", self.__fetch_seconds)
+        self.metrics.add_time("dependency and resource collection", self.__collect_seconds)
+        self.__fetch_seconds = self.__collect_seconds = 0.0
+        if self.__collect_predecessors:
+            columns["Predecessors"] = self.__render_predecessors(columns["UniqueID"])
+        for head_title in columns:
+            if head_title in self.walk_headers or head_title in self.text_headers:
+                continue
+            if head_title in self.date_headers:
+                columns[head_title] = _to_datetime(columns[head_title])
+            elif head_title in self.percent_headers:
+                columns[head_title] = _to_percent(columns[head_title])
+            elif head_title in self.categorical_headers or _is_low_cardinality(columns[head_title]):
+                columns[head_title] = pd.Categorical(columns[head_title])
+
+    def __render_predecessors(self, unique_ids):
+        """renders "UniqueID-Name" of the predecessors of the rows executed since the last call, separated by ", " """
+        rendered = []
+        walked = self.__walked
+        for unique_id, predecessor_unique_ids in zip(unique_ids, self.__row_predecessors):
+            if not walked.issuperset(predecessor_unique_ids):
+                self.forward_references.append(unique_id)
+            rendered.append(", ".join(str(p) + "-" + str(self.graph.name(p)) for p in predecessor_unique_ids))
+        self.__row_predecessors = []
+        return rendered
+
+    def __collect_resource_names(self, t, unique_id):
+        res = []  # an empty list to add resources
+        self.com_calls["Assignments"] += 1
+        if self.__debug:
+            self.logger.debug("Collecting Task Resources for %s", unique_id)
+        for r in t.Assignments:
+            res.append(r.ResourceName)
+            if self.__debug:
+                self.logger.debug("ResourceName is %s", res[-1])
+        self.com_calls["Assignment.ResourceName"] += len(res)
+        return ", ".join(res)
+
+
+def _to_datetime(values):
+    """returns a datetime64 array of dates read as datetimes (typed properties) or as text (Task.GetField)"""
+    dates = pd.to_datetime(pd.Series(values, dtype=object), dayfirst=True, errors="coerce")
+    if getattr(dates.dt, "tz", None) is not None:  # pywintypes datetimes carry a time zone
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy()
+
+
+def _to_percent(values):
+    """returns a uint8 array of percentages read as numbers (typed properties) or as text, e.g. "50%" (Task.GetField)"""
+    percent = pd.Series(values, dtype=object)
+    if len(percent) and isinstance(percent.iat[0], str):
+        percent = percent.str.rstrip("%")
+    return pd.to_numeric(percent, errors="coerce").fillna(0).astype("uint8").to_numpy()
+
+
+def _is_low_cardinality(values):
+    """True when a column of text holds few distinct values (so is smaller as a categorical)"""
+    return len(values) > 0 and isinstance(values[0], str) and len(set(values)) <= len(values) // 2
+
+
+def flatten_tasks(task_collection, plan, UniqueIDs_to_Ignore=[], logger=None, prune_subtrees=False):
+    """Walks a collection of MSProject tasks and returns the "flattened" Pandas dataframe, i.e.
+    one row per task with its summary tasks collapsed into the SummaryTask column "Level 1>Level 2>Level 3"
+
+    Each header is collected into its own column buffer and the dataframe is built once at the end,
+    so the cost grows linearly with the number of tasks.  The summary tasks are added to plan.outline
+    and SummaryTask is a categorical column of their paths, each path being rendered once.
+
+    Arguments:
+        task_collection {iterable} -- MSProject Tasks collection (or any iterable of objects with the same Task interface)
+        plan {FieldExtractionPlan} -- extraction plan for the headers to output
+
+    Keyword Arguments:
+        UniqueIDs_to_Ignore {list or set} -- Unique Task Ids of any tasks that need to be ignored (default: {[]})
+        logger {logging.Logger} -- logger to report to (default: {None}, uses the 'Log' logger)
+        prune_subtrees {bool} -- also skip every task below an ignored summary task, see iter_flattened_tasks (default: {False})
+
+    Returns:
+        [DataFrame] -- dataframe of the tasks indexed by UniqueID
+    """
+    return next(iter_flattened_tasks(task_collection, plan, None, UniqueIDs_to_Ignore, logger, prune_subtrees))
+
+
+def iter_flattened_tasks(task_collection, plan, batch_size=None, UniqueIDs_to_Ignore=[], logger=None, prune_subtrees=False):
+    """Walks a collection of MSProject tasks as flatten_tasks does, yielding the flattened dataframe in
+    batches of batch_size rows as the walk goes, so only one batch of rows is held at a time.
+    The summary tasks above the current task are carried from one batch to the next.
+
+    The Predecessors of a batch are named from the tasks walked so far, a predecessor further down the
+    project (a forward reference) is rendered "UniqueID-" and the Unique IDs of its tasks are added to
+    plan.forward_references; once the walk is over plan.graph holds every name.
+
+    An ignored summary task is left out of the SummaryTask paths, its tasks are output under its parent.
+    With prune_subtrees the tasks below it are skipped as well: only their OutlineLevel is read, none of
+    their fields, dependencies or assignments (so they can not be named as predecessors).  The tasks
+    pruned and the calls saved are counted in plan.metrics ("pruned tasks", "calls skipped").
+
+    Arguments:
+        task_collection {iterable} -- MSProject Tasks collection (or any iterable of objects with the same Task interface)
+        plan {FieldExtractionPlan} -- extraction plan for the headers to output
+
+    Keyword Arguments:
+        batch_size {int} -- number of rows of each dataframe, None for one dataframe of all the rows (default: {None})
+        UniqueIDs_to_Ignore {list or set} -- Unique Task Ids of any tasks that need to be ignored (default: {[]})
+        logger {logging.Logger} -- logger to report to (default: {None}, uses the 'Log' logger)
+        prune_subtrees {bool} -- skip every task below an ignored summary task (default: {False})
+    """
+    if logger is None:
+        logger = logging.getLogger('Log')
+    # outline nodes of the summary tasks above the current task (node 0 is the project itself)
+    summary_tasks_to_task = []
+    outline = plan.outline
+    com_calls = plan.com_calls
+    metrics = plan.metrics
+
+    columns = _column_buffers(plan)
+
+    # the tasks to ignore, and those found in the project
+    to_ignore = frozenset(UniqueIDs_to_Ignore)
+    ignored_found = set()
+    # outline level of the ignored summary task whose subtree is being pruned
+    pruned_level = None
+
+    started = time.perf_counter()
+    num_of_tasks = num_of_summary_tasks = num_of_pruned_tasks = 0
+    for t in task_collection:
+        num_of_tasks += 1
+        outline_level = t.OutlineLevel
+        com_calls["Task"] += 1
+        if pruned_level is not None:
+            if outline_level > pruned_level:
+                num_of_pruned_tasks += 1
+                continue
+            pruned_level = None
+        unique_id = t.UniqueID
+        summary = t.Summary
+        com_calls["Task"] += 2
+        # print to log if as task to be ignored was found
+        ignored = unique_id in to_ignore
+        if ignored:
+            logger.info("Task %s was ignored as requested", str(unique_id))
+            ignored_found.add(unique_id)
+            if summary and prune_subtrees:
+                pruned_level = outline_level
+        if summary or ignored:
+            name = t.Name
+            com_calls["Task"] += 1
+            num_of_summary_tasks += summary
+            plan.add_task_name(unique_id, name)
+        if not summary and not ignored:  # i.e. it is a task line not a Summary Task
+            # it is not good practic but it is possible to have project tasks at the top level (outline level 1)
+            # So this if statement catches those occurances and empties summary_tasks_to_task list
+            if outline_level == 1:
+                summary_tasks_to_task = []
+
+            columns["UniqueID"].append(unique_id)
+            columns["SummaryTask"].append(summary_tasks_to_task[-1] if summary_tasks_to_task else 0)
+            plan.execute(t, unique_id, columns)
+            if batch_size and len(columns["UniqueID"]) >= batch_size:
+                metrics.add_time("task iteration", time.perf_counter() - started)
+                yield _batch_data_frame(plan, columns)
+                columns = _column_buffers(plan)
+                started = time.perf_counter()  # the time spent by the consumer is not part of the walk
+
+        elif summary and (outline_level > len(summary_tasks_to_task)):
+            # if tasks is a summary task and its outline level is greater than number of summary tasks in the list
+            # summaryTasksToTask then add that summary task to the list
+            if not ignored:
+                summary_tasks_to_task.append(outline.add_summary_task(
+                    summary_tasks_to_task[-1] if summary_tasks_to_task else 0, name, unique_id))
+
+        else:
+            if not ignored:
+                while not len(summary_tasks_to_task) == outline_level - 1:
+                    # if tasks is a summary task and its outline level is less than number of summary tasks in the list
+                    # summaryTasksToTask then remove last summary task from list and add new summary task to the list
+                    summary_tasks_to_task.pop()
+
+                summary_tasks_to_task.append(outline.add_summary_task(
+                    summary_tasks_to_task[-1] if summary_tasks_to_task else 0, name, unique_id))
+
+    # print to log the to be ignored tasks that were not ignored as not in the project file
+    for t in to_ignore - ignored_found:
+        logger.info("Task %s was not ignored, as not in project file", str(t))
+    metrics.add_time("task iteration", time.perf_counter() - started)
+    metrics.count("tasks", num_of_tasks)
+    metrics.count("summary tasks", num_of_summary_tasks)
+    metrics.count("ignored tasks", len(ignored_found))
+    if prune_subtrees:
+        metrics.count("pruned tasks", num_of_pruned_tasks)
+        # UniqueID and Summary, plus the fields, dependencies and assignments of each pruned task
+        metrics.count("calls skipped", num_of_pruned_tasks * (2 + plan.calls_per_task))
+        logger.info("%s tasks below ignored summary tasks were skipped", num_of_pruned_tasks)
+    if len(columns["UniqueID"]) or not metrics.counts["rows"]:
+        yield _batch_data_frame(plan, columns)
+
+
+def _column_buffers(plan):
+    """returns one empty buffer per header, UniqueID and SummaryTask (outline nodes) buffers are typed"""
+    columns = collections.OrderedDict((head_title, []) for head_title in plan.headers)
+    columns["UniqueID"] = array.array("q")
+    columns["SummaryTask"] = array.array("q")
+    return columns
+
+
+def _batch_data_frame(plan, columns):
+    """builds the dataframe of the rows in the column buffers, indexed by the unique MS Project Task ID"""
+    with plan.metrics.phase("frame build"):
+        plan.metrics.count("rows", len(columns["UniqueID"]))
+        plan.finish(columns)
+        plan.summary_nodes.extend(columns["SummaryTask"])
+        columns["SummaryTask"] = plan.outline.categorical(columns["SummaryTask"])
+        index = pd.Index(columns.pop("UniqueID"), dtype="int64", name="UniqueID")
+        return pd.DataFrame(columns, index=index, columns=[h for h in plan.headers if h != "UniqueID"])
+
 
 class DataFrameOfMSProject(object):
-       
-    def __init__(self, headers=None, ms_project_file=None, logging_level="INFO", UniqueIDs_to_Ignore=[]):
+    # the headers always output, and the only ones extracted up front with lazy_columns=True
+    core_headers = ("UniqueID", "SummaryTask", "Name", "Start", "Finish", "% Complete")
+
+    def __init__(self, headers=None, ms_project_file=None, logging_level="INFO", UniqueIDs_to_Ignore=[], task_source=None,
+                 cache=None, session_pool=None, extract=True, prune_ignored_subtrees=False, lazy_columns=False):
         """Creates and returns a Pandas dataframe of a "flattened" MSProject file.  By "Flattened"
         means a table of tasks with summary tasks collapsed to one line, e.g. "Level 1 > Level 2 > Level 3"
         
         Keyword Arguments:
             headers {list} -- List of headers using MSProject exact field names (default: {None})
             ms_project_file {str} -- full path string to MSPorject File (r"C/path/to/MyProjectFile.mpp" (default: {None})
+                                     or to a Project XML File (r"C/path/to/MyProjectFile.xml") which is read without MSProject
             logging_level {str} -- Options: "DEBUG" or "INFO" (default: {"INFO"})
-            UniqueIDs_to_Ignore {list} -- Provide a list (Unique Task Ids) of any tasks that need to be ignored (default: {[]})
+            UniqueIDs_to_Ignore {list or set} -- Provide a list (Unique Task Ids) of any tasks that need to be ignored (default: {[]})
+            task_source {TaskSource} -- read the tasks from this (unopened) task source instead of ms_project_file (default: {None})
+            cache {ProjectSnapshotCache} -- reuse the dataframe cached for an unchanged project file instead of extracting it,
+                                            and cache newly extracted dataframes (default: {None})
+            session_pool {MSProjectSessionPool} -- open the MSProject file in a warm session leased from the pool
+                                                   rather than starting (and quitting) MSProject (default: {None})
+            extract {bool} -- extract the project DataFrame now, False leaves the project open for iter_task_batches
+                              to stream the tasks batch by batch without holding them all (default: {True})
+            prune_ignored_subtrees {bool} -- also ignore every task below an ignored summary task, without reading
+                                             any of their fields (default: {False}, they are output under its parent)
+            lazy_columns {bool} -- only extract the core_headers now, the other headers (Notes, Resource Names,
+                                   Predecessors...) are fetched together in one more pass over the project
+                                   the first time one of them is needed, see materialize.  The reports are
+                                   built on the columns extracted so far and only fetch the deferred headers
+                                   they filter on or are given (headers=), iter_task_batches fetches them
+                                   all (default: {False})
         """
         #create directory for log files if one does not exist
         pathlib.Path('log').mkdir(parents=True, exist_ok=True)        
 
         self.logging_level=logging_level
+        self.__metrics = RunMetrics()
         self.set_up_Logger()
         self.logger.info("Initiation")
-        self.ms_project_file = ms_project_file
         self.UniqueIDs_to_Ignore=UniqueIDs_to_Ignore
-        
+        self.prune_ignored_subtrees = prune_ignored_subtrees
+        self.lazy_columns = lazy_columns
+        self.__plan = None
+        self.__materialize_plans = []
+        self.__deferred_headers = []
+        self.__dependency_graph = None
+        self.__outline_tree = None
+        self.__summary_nodes = None
+        self.__task_filter = None
+        self.__projectDataFrame = None
+        self.__task_source = None
+        if task_source is None:
+            self.ms_project_file = ms_project_file
+            if self.ms_project_file:
+                task_source = task_source_for_file(self.ms_project_file, self.logger, session_pool)
+        else:
+            self.__ms_project_file = task_source.name
+        # kept (closed) to fetch the deferred headers later on
+        self.__lazy_source = task_source if lazy_columns and extract else None
 
-        if self.ms_project_file:
-            """If ms_project_file is a valid MS Project File setup MSProject application,
-            create MSProject object reference, load pjFields, then close the MSProject file
+        cache_key = None
+        cached_frame = None
+        if task_source and cache is not None and extract:
+            with self.__metrics.phase("cache load"):
+                cache_key = cache.key(self.__ms_project_file, self.resolve_headers(headers), self.UniqueIDs_to_Ignore,
+                                      prune_ignored_subtrees=self.prune_ignored_subtrees,
+                                      lazy_columns=self.lazy_columns)
+                cached_frame = cache.load(cache_key)
+            if cached_frame is not None:
+                self.logger.info("Project dataframe loaded from cache, extraction skipped")
+                self.__headers = self.resolve_headers(headers)
+                self.__projectDataFrame = cached_frame
+                self.__deferred_headers = [h for h in self.__headers
+                                           if h != "UniqueID" and h not in cached_frame.columns]
+                task_source = None
+
+        if task_source:
+            """If ms_project_file is a valid MS Project File open it through its task source,
+            load pjFields, then close the MSProject file
             """
 
             self.logger.debug("inside: def __init__ loop:  if self.ms_project_file")
-            self.__mspApplication, self.__project = self.ms_project_object(self.__ms_project_file)
-
-            self.headers = headers
-            if self.headers:
-                # tested if HeadersList is a valid set of MS Project Headers
-                # can only do after MS Project file has been loaded as need to use Projec to check
-                self.logger.debug("inside: def __init__:  if self.headers")
-                self.__create_project_data_frame()
-                self.ms_project_object_close()
-            else:
+            with self.__metrics.phase("open"):
+                self.__task_source = task_source.open()
+
+            try:
+                self.headers = headers
+                if self.headers:
+                    # tested if HeadersList is a valid set of MS Project Headers
+                    # can only do after MS Project file has been loaded as need to use Projec to check
+                    self.logger.debug("inside: def __init__:  if self.headers")
+                    if not extract:
+                        self.logger.info("Project left open for iter_task_batches")
+                        return
+                    self.__create_project_data_frame()
+            except Exception:
+                # do not leave MS Project running (or the pooled session leased) after a failed extraction
+                self.ms_project_object_close(broken=True)
+                raise
+            self.ms_project_object_close()
+            if not self.headers:
                 self.logger.error("Headers list provided contains error")
                 print("Headers list provided contains error")
-                self.ms_project_object_close()
-        else:
+            elif cache is not None:
+                with self.__metrics.phase("cache store"):
+                    cache.store(cache_key, self.__projectDataFrame)
+        elif cached_frame is None:
             # tested if ms_project_file is a valid MS Project File
             print("Not a MS Project File or File does not exist")
             self.logger.error("Not a MS Project File or File does not exist")
@@ -60,25 +460,8 @@ class DataFrameOfMSProject(object):
         
      
     def set_up_Logger(self):
-        # delete old log
-        now=dt.datetime.now().strftime("%Y-%m-%d %H-%M-%S")        
-        
-        # create logger
-        self.logger = logging.getLogger('Log')
-        if self.logging_level=="DEBUG":
-            self.logger.setLevel(logging.DEBUG)
-        elif self.logging_level=="INFO":
-            self.logger.setLevel(logging.INFO)            
-        # create formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)-4s - %(levelname)-8s - function: %(funcName)-15s LineNum: %(lineno)-5d - %(message)s',
-                                          datefmt='%m-%d-%Y %H:%M')
-        logpath="log/"+now+__name__
-        handler = logging.handlers.RotatingFileHandler(logpath+".log", maxBytes=1000000, backupCount=5)  
-        handler.setLevel(logging.DEBUG)
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
-        self.logger.addHandler(handler)
-            
+        # the log file handler is only attached once per process (see runMetrics.set_up_logger)
+        self.logger = set_up_logger(self.logging_level, __name__)
         return
         
     @property
@@ -94,13 +477,13 @@ class DataFrameOfMSProject(object):
         If None is entered, it prompts for the file via a dialog box
         """
         if f is None:
-            f = self.select_file(ext="*.mpp", filters="MS Project Files (*.mpp)|*.mpp||")
+            f = self.select_file(ext="*.mpp", filters="MS Project Files (*.mpp;*.xml)|*.mpp;*.xml||")
             # see nullege.com/codes/search/win32ui.CreateFileDialog
         self.logger.debug("Entered: @Property.setter > ms_project_file")
         file = pathlib.Path(f)
         self.logger.debug("file.is_file() ==True %s ", file.is_file())
         self.logger.debug("file.suffix == .mpp %s ", file.suffix == ".mpp")
-        if file.is_file() is True and file.suffix == ".mpp":
+        if file.is_file() is True and file.suffix in (".mpp", ".xml"):
             self.logger.debug("Entered: @Property.setter > ms_project_file is a proper project file")
             self.__ms_project_file = f
         else:
@@ -130,20 +513,28 @@ class DataFrameOfMSProject(object):
         These headers "UniqueID", "SummaryTask","Name","Start","Finish","% Complete" will always be output
         """
         self.logger.debug("Entered: @Property.setter > headers")
-        const_header = ["UniqueID", "SummaryTask", "Name", "Start", "Finish", "% Complete"]
         if extra_headers is None or extra_headers == []:
             self.logger.debug("Inside def headers.setter : TRUE, h==None or h==[]")
             self.logger.info("No extra headers set because extra_headers = %s",extra_headers)
-            self.__headers = const_header+["Resource Names", "Notes", "Predecessors"]
+            self.__headers = self.resolve_headers(extra_headers)
         else:
             self.logger.info("***Extra headers requested: %s", extra_headers)
             if self.__do_list_of_headers_exist_in_ms_project(extra_headers):
                 self.logger.debug("****in: if self.__doListOfHeadersExistInMSProject(h)")
-                self.__headers = []
-                [self.__headers.append(v) for v in const_header + extra_headers if v not in self.__headers]
+                self.__headers = self.resolve_headers(extra_headers)
                 self.logger.info("****** final list of headers %s", self.__headers)
             else:
                 self.__headers = False
+
+    @staticmethod
+    def resolve_headers(extra_headers):
+        """returns the full list of headers output for extra_headers (without checking they exist in MS Project)"""
+        const_header = list(DataFrameOfMSProject.core_headers)
+        if extra_headers is None or extra_headers == []:
+            return const_header+["Resource Names", "Notes", "Predecessors"]
+        headers = []
+        [headers.append(v) for v in const_header + extra_headers if v not in headers]
+        return headers
             
     def __do_list_of_headers_exist_in_ms_project(self, header_list):
         """Checks to see if all the headers listed exist in MS Project
@@ -158,11 +549,13 @@ class DataFrameOfMSProject(object):
         self.logger.debug("def __doListOfHeadersExistInMSProject")
         for header in header_list:
             self.logger.debug("%s",header)
+            if header in FieldExtractionPlan.walk_headers + FieldExtractionPlan.collected_headers:
+                continue  # filled in by the extraction plan, whatever fields the task source has
             try:
-                self.__mspApplication.FieldNameToFieldConstant(header)
+                self.__task_source.field_constant(header)
             except:
-                self.logger.error("%s", header, " is not a valid MS Project Heading")
-                print ("%s", header, " is not a valid MS Project Heading")
+                self.logger.error("%s is not a valid MS Project Heading", header)
+                print ("%s is not a valid MS Project Heading" % header)
                 return False
         self.logger.info("header list is good") 
         return True
@@ -179,29 +572,27 @@ class DataFrameOfMSProject(object):
         """
 
         self.logger.debug("Entered: defMSProjectObject")
-        self.logger.info("path to MS Project file entered is %s", path_to_ms_project)
-        msp = win32com.client.Dispatch("MSProject.Application")
-        msp.DisplayAlerts=False
-        msp.FileOpen(path_to_ms_project)
-        project = msp.ActiveProject
-        msp.DisplayAlerts=True
-        self.logger.debug("Inside def MSProjectObject > created msp application object and project Object")
-        return msp, project
+        self.__task_source = ComTaskSource(path_to_ms_project, self.logger).open()
+        return self.__task_source.application, self.__task_source.project
     
-    def ms_project_object_close(self):
-        """Closes the MS Project Application
+    def ms_project_object_close(self, broken=False):
+        """Closes the MS Project Application (or whichever task source the project was read from)
+
+        Keyword Arguments:
+            broken {bool} -- closing after a failure reading the project, a pooled session is discarded (default: {False})
         """
 
         self.logger.debug("Entered: def MSProjectObjectClose")
-        self.__mspApplication.FileSave()
-        self.__mspApplication.Quit()
-        self.logger.debug("Inside def MSProjectObjectClose > closed application")
+        with self.__metrics.phase("close"):
+            self.__task_source.close(broken)
+        self.__task_source = None
         return
     
     @property
     def project_data_frame(self):
         """
-        returns project DataFrame
+        returns project DataFrame (with lazy_columns=True, only the columns extracted so far,
+        use project[header] or materialize() for the deferred ones)
         """
         self.logger.debug("Entered: @Property > projectDataFrame")
         return self.__projectDataFrame       
@@ -214,85 +605,256 @@ class DataFrameOfMSProject(object):
         self.logger.debug("Entered: __setDataFrame")
         pass
         
+    @property
+    def com_call_counts(self):
+        """
+        returns a dictionary of the number of calls made to MSProject (by call) while creating the project DataFrame
+        """
+        com_calls = collections.Counter()
+        for plan in [self.__plan] + self.__materialize_plans:
+            if plan is not None:  # e.g. loaded from the cache
+                com_calls.update(plan.com_calls)
+        return dict(com_calls)
+
+    @property
+    def metrics(self):
+        """
+        returns a dictionary of the time spent in each phase (open, task iteration, field fetch,
+        dependency and resource collection, frame build, close, cache, filtering, bucketing) in "seconds",
+        the "counts" (tasks, rows, reports...) and the "com_calls" made
+        """
+        metrics = RunMetrics().update(self.__metrics)
+        for plan in [self.__plan] + self.__materialize_plans:
+            if plan is not None:
+                metrics.update(plan.metrics)
+        metrics = metrics.as_dict()
+        metrics["com_calls"] = self.com_call_counts
+        return metrics
+
+    @property
+    def dependency_graph(self):
+        """
+        returns the DependencyGraph of the tasks, e.g. to find what an overdue task blocks:
+        project.dependency_graph.downstream(unique_id)
+        """
+        self.__require(["Predecessors"])
+        if self.__dependency_graph is None:  # e.g. loaded from the cache, rebuild it from the Predecessors column
+            self.__dependency_graph = DependencyGraph.from_frame(self.__projectDataFrame)
+        return self.__dependency_graph
+
+    @property
+    def outline_tree(self):
+        """
+        returns the OutlineTree of the summary tasks
+        """
+        if self.__outline_tree is None:  # e.g. loaded from the cache, rebuild it from the SummaryTask column
+            # (without the Unique IDs of the summary tasks, so they can only be found by name or path)
+            self.__outline_tree = OutlineTree.from_paths(self.__projectDataFrame["SummaryTask"].unique())
+        return self.__outline_tree
+
+    def leaf_tasks_under(self, summary):
+        """returns the tasks (rows of project_data_frame) below a summary task, at any depth
+
+        Arguments:
+            summary {int or str} -- Unique ID, name or path ("Level 1>Level 2") of the summary task
+
+        Raises:
+            ValueError -- no summary task has this Unique ID, name or path (after a cache load the summary
+                          tasks have no Unique IDs, they can only be found by name or path)
+        """
+        nodes = self.outline_tree.find(summary)
+        if len(nodes) == 0:
+            raise ValueError("No summary task %r in the project" % (summary,))
+        below = self.outline_tree.descendants(nodes)
+        if self.__summary_nodes is not None:
+            # the tasks of the outline nodes, so summary tasks sharing a path (same names) are told apart
+            return self.__projectDataFrame[below[self.__summary_nodes]]
+        paths = {self.outline_tree.path(node) for node in np.flatnonzero(below)}
+        return self.__projectDataFrame[self.__projectDataFrame["SummaryTask"].isin(paths)]
+
     def __create_project_data_frame(self):
-        self.__projectDataFrame = pd.DataFrame(columns=self.__headers)
-        summary_tasks_to_task = []
-        task_collection= self.__project.Tasks
-        
-        # A list containing the tasks that were not ignored, initially contains all task to be ignored
-        notIgnoredTask=self.UniqueIDs_to_Ignore[:]
-        
-        for t in task_collection:
-            # print to log if as task to be ignored was found
-            if (t.UniqueID in self.UniqueIDs_to_Ignore):
-                self.logger.info("Task %s was ignored as requested", str(t.UniqueID))
-                notIgnoredTask.remove(t.UniqueID)
-            if (not t.Summary) & ~(t.UniqueID in self.UniqueIDs_to_Ignore):  # i.e. it is a task line not a Summary Task
-                # find dependent task
-                dep = []  # an empty list to add dependent task id
-                self.logger.debug("Collecting Task Dependencies for %s", t.UniqueID)
-                for d in t.TaskDependencies:
-                    if int(d.From) != t.UniqueID:  # a task can have multiple references to itself, not sure why, but this removes them
-                        dep.append(str(d.From) + "-" + str(d.From.Name))
-                
-                # collect resource names        
-                res = []  # an empty list to add resources
-                self.logger.debug("Collecting Task Resources for %s", t.UniqueID)
-                for r in t.Assignments:
-                    self.logger.debug("ResourceName is %s", r.ResourceName)
-                    res.append(r.ResourceName)    
-                
-                # it is not good practic but it is possible to have project tasks at the top level (outline level 1)
-                # So this if statement catches those occurances and empties summary_tasks_to_task list                 
-                if t.OutlineLevel ==1:
-                    summary_tasks_to_task = []                
-                
-                # create a temporary "temp" list variable holding the entries for the dataframe row.
-                sum_task = ">".join(summary_tasks_to_task)
-                dependencies = [", ".join(dep)]
-                resources = [", ".join(res)]
-                
-                temp = [t.UniqueID, sum_task]
-                for head_title in self.__headers:
-                    if head_title != "UniqueID" and head_title != "SummaryTask":
-                        # note that dependencies and resources have been created by iterating over their
-                        # respective collection objects and are therefore not found via Task.GetField
-                        if head_title == "Predecessors":
-                            temp = temp+dependencies
-                        elif head_title=="Resource Names":
-                            temp = temp+resources
-                        else:
-                            temp = temp+[t.GetField(self.__mspApplication.FieldNameToFieldConstant(head_title))]
-                       
-                self.__projectDataFrame = self.__projectDataFrame.append(pd.Series(temp, index=self.__headers), ignore_index=True)
-            
-            elif t.Summary & (t.OutlineLevel > len(summary_tasks_to_task)):
-                # if tasks is a summary task and its outline level is greater than number of summary tasks in the list
-                # summaryTasksToTask then add that summary task to the list
-                if not(t.UniqueID in self.UniqueIDs_to_Ignore):
-                    summary_tasks_to_task.append(t.Name)
-                
-            else:
-                if not(t.UniqueID in self.UniqueIDs_to_Ignore):
-                    while not len(summary_tasks_to_task) == t.OutlineLevel - 1:
-                        # if tasks is a summary task and its outline level is less than number of summary tasks in the list
-                        # summaryTasksToTask then remove last summary task from list and add new summary task to the list
-                        summary_tasks_to_task.pop()
-                
-                    summary_tasks_to_task.append(t.Name)
-        
-        # print to log the to be ignored tasks that were not ignored as not in the project file
-        for t in notIgnoredTask:
-            self.logger.info("Task %s was not ignored, as not in project file", str(t))
-        
-        # finally, set the index of the dataframe to the unique MS Project Task ID
-        self.__projectDataFrame = self.__projectDataFrame.set_index("UniqueID")
-        self.__projectDataFrame["Finish"] = pd.to_datetime(self.__projectDataFrame["Finish"],dayfirst=True)
-        self.__projectDataFrame["Start"] = pd.to_datetime(self.__projectDataFrame["Start"],dayfirst=True)
+        headers = self.__headers
+        if self.lazy_columns:
+            headers = [h for h in self.__headers if h in self.core_headers]
+            self.__deferred_headers = [h for h in self.__headers if h not in self.core_headers]
+            self.logger.info("Headers deferred until needed: %s", self.__deferred_headers)
+        self.__plan = FieldExtractionPlan(headers, self.__task_source.field_constant,
+                                          self.__task_source.predecessor_unique_ids, self.__task_source.typed_fields,
+                                          self.logger)
+        self.__projectDataFrame = flatten_tasks(self.__task_source.tasks, self.__plan,
+                                                self.UniqueIDs_to_Ignore, self.logger, self.prune_ignored_subtrees)
+        if "Predecessors" not in self.__deferred_headers:
+            self.__dependency_graph = self.__plan.graph
+        self.__outline_tree = self.__plan.outline
+        self.__summary_nodes = np.array(self.__plan.summary_nodes, dtype=np.int64)
+        self.logger.info("MSProject calls made: %s", self.com_call_counts)
         return        
+
+    @property
+    def deferred_headers(self):
+        """
+        returns the headers not extracted yet (lazy_columns=True), fetched by materialize
+        """
+        return list(self.__deferred_headers)
+
+    def materialize(self, headers=None):
+        """fetches the deferred headers in one pass over the project (reopening it) and adds their columns
+        to the project DataFrame, returns the project DataFrame.  Does nothing once they have been fetched.
+
+        Keyword Arguments:
+            headers {list} -- only fetch the deferred headers among these (default: {None}, all of them)
+        """
+        if headers is None:
+            fetched = list(self.__deferred_headers)
+        else:
+            fetched = [h for h in self.__deferred_headers if h in headers]
+        if not fetched:
+            return self.__projectDataFrame
+        if self.__lazy_source is None:
+            raise RuntimeError("The deferred headers %s can not be fetched, the project has no task source"
+                               % fetched)
+        self.logger.info("Fetching the deferred headers %s", fetched)
+        with self.__metrics.phase("open"):
+            source = self.__lazy_source.open()
+        broken = True
+        try:
+            plan = FieldExtractionPlan(["UniqueID", "SummaryTask"] + fetched, source.field_constant,
+                                       source.predecessor_unique_ids, source.typed_fields, self.logger)
+            with self.__metrics.phase("materialize"):
+                deferred = flatten_tasks(source.tasks, plan, self.UniqueIDs_to_Ignore, self.logger,
+                                         self.prune_ignored_subtrees)
+            broken = False
+        finally:
+            with self.__metrics.phase("close"):
+                source.close(broken)
+        # the same tasks are walked in the same order, align on the Unique IDs all the same
+        deferred = deferred.drop(columns="SummaryTask").reindex(self.__projectDataFrame.index)
+        frame = pd.concat([self.__projectDataFrame, deferred], axis=1)
+        self.__projectDataFrame = frame[[h for h in self.__headers if h in frame.columns]]
+        if "Predecessors" in fetched:
+            self.__dependency_graph = plan.graph
+        self.__materialize_plans.append(plan)
+        self.__task_filter = None  # rebuilt over the completed DataFrame
+        self.__deferred_headers = [h for h in self.__deferred_headers if h not in fetched]
+        self.__metrics.count("materializations")
+        self.logger.info("MSProject calls made: %s", self.com_call_counts)
+        return self.__projectDataFrame
+
+    def __require(self, headers):
+        """materializes the deferred headers among headers"""
+        if headers is None:
+            return
+        if isinstance(headers, str):
+            headers = [headers]
+        self.materialize(headers)
+
+    def __getitem__(self, header):
+        """returns the column header of the project DataFrame, fetching the deferred headers if it is one of them"""
+        self.__require([header])
+        return self.__projectDataFrame[header]
     
+    def iter_task_batches(self, batch_size=10000):
+        """yields the project DataFrame in batches (DataFrames) of batch_size rows.
+
+        When the project was opened with extract=False the tasks are walked as the batches are consumed and
+        only one batch is held at a time (see iter_flattened_tasks, predecessors further down the project are
+        rendered "UniqueID-" in the earlier batches); the project is closed once the last batch has been
+        yielded and dependency_graph / outline_tree then cover the whole project.
+        Otherwise the batches are slices of project_data_frame.
+
+        Keyword Arguments:
+            batch_size {int} -- number of rows (tasks) in a batch (default: {10000})
+        """
+        if self.__projectDataFrame is not None:
+            self.materialize()  # the batches hold every header
+            for first in range(0, len(self.__projectDataFrame), batch_size):
+                yield self.__projectDataFrame.iloc[first:first + batch_size]
+            return
+        if self.__task_source is None:
+            raise RuntimeError("The project is not open, its tasks have already been streamed or could not be read")
+        self.__plan = FieldExtractionPlan(self.__headers, self.__task_source.field_constant,
+                                          self.__task_source.predecessor_unique_ids, self.__task_source.typed_fields,
+                                          self.logger)
+        broken = True
+        try:
+            for batch in iter_flattened_tasks(self.__task_source.tasks, self.__plan, batch_size,
+                                              self.UniqueIDs_to_Ignore, self.logger, self.prune_ignored_subtrees):
+                broken = False
+                yield batch  # the consumer stopping early (GeneratorExit) does not break the session
+                broken = True
+            broken = False
+        finally:
+            self.ms_project_object_close(broken)
+        self.__dependency_graph = self.__plan.graph
+        self.__outline_tree = self.__plan.outline
+        if self.__plan.forward_references:
+            self.logger.info("%s tasks have predecessors further down the project, rendered as UniqueID- only",
+                             len(self.__plan.forward_references))
+        self.logger.info("MSProject calls made: %s", self.com_call_counts)
+
+    def iter_report_batches(self, report="WIP", due_date=None, header_to_filter=None, filter_text=None,
+                            duration_of_periods=7, num_of_periods=5, flag_incomplete_only=True,
+                            flag_OUTPUT_WIP_COLUMN=True, batch_size=10000):
+        """yields, for each batch of iter_task_batches, the dictionary of DataFrames output_dictionary_of_data_frames_WIP
+        (report="WIP") or output_dictionary_of_data_frames_FINISHING (report="FINISHING") gives for the tasks of the batch.
+
+        Appending the DataFrames of each period batch after batch gives the report of the whole project,
+        e.g. excelReportWriter.writeExcelBatches(xlPath, project.iter_report_batches("WIP", "01/06/2018"))
+        """
+        if due_date is None:  # if no date offered, use todays date
+            due_date = dt.datetime.today().date()
+        else:
+            due_date = dt.datetime.strptime(due_date, "%d/%m/%Y").date()
+        if report == "FINISHING":
+            num_of_periods -= 1  # as output_dictionary_of_data_frames_FINISHING
+        buckets = PeriodBuckets(due_date, duration_of_periods, num_of_periods)
+        self.logger.info("report = %s, keys = %s, batch size = %s", report, buckets.keys, batch_size)
+        for batch in self.iter_task_batches(batch_size):
+            mask = np.ones(len(batch), dtype=bool)
+            if header_to_filter is not None and filter_text is not None:
+                mask &= TaskFilter(batch).mask(header_to_filter, filter_text)
+            if flag_incomplete_only is True:
+                mask &= (batch["% Complete"] < 100).to_numpy()
+            with self.__metrics.phase("bucketing"):
+                if report == "FINISHING":
+                    data_frame_collection = buckets.finishing(batch[mask])
+                else:
+                    data_frame_collection = buckets.wip(batch[mask], flag_OUTPUT_WIP_COLUMN)
+            self.__metrics.count("report batches")
+            yield data_frame_collection
+
+    @property
+    def task_filter(self):
+        """
+        returns the TaskFilter of the project DataFrame (built once, shared by all the reports)
+        """
+        if self.__task_filter is None:
+            self.__task_filter = TaskFilter(self.__projectDataFrame)
+        return self.__task_filter
+
+    def filter_mask(self, header_to_filter=None, filter_text=None, flag_incomplete_only=True):
+        """returns a boolean array, True for the tasks of the project DataFrame matching the filter (see filter_tasks)"""
+        self.__require(header_to_filter)
+        with self.__metrics.phase("filtering"):
+            mask = np.ones(len(self.project_data_frame), dtype=bool)
+            if header_to_filter is not None and filter_text is not None:
+                mask &= self.task_filter.mask(header_to_filter, filter_text)
+            if flag_incomplete_only is True:
+                mask &= (self.project_data_frame["% Complete"] < 100).to_numpy()
+        return mask
+
+    def filter_tasks(self, header_to_filter=None, filter_text=None, flag_incomplete_only=True):
+        """returns the tasks of the project DataFrame matching the filter (see TaskFilter.mask)
+
+        Keyword Arguments:
+            header_to_filter {str or list} -- header(s) of the column(s) to filter, no filtering if None (default: {None})
+            filter_text {str or list} -- regular expression(s) the column(s) have to match (default: {None})
+            flag_incomplete_only {bool} -- only keep the tasks that are not 100% complete (default: {True})
+        """
+        return self.project_data_frame[self.filter_mask(header_to_filter, filter_text, flag_incomplete_only)]
+
     def output_dictionary_of_data_frames_FINISHING(self, due_date=None, header_to_filter=None, filter_text=None,
-                                         duration_of_periods=7, num_of_periods=5, flag_incomplete_only=True):
+                                         duration_of_periods=7, num_of_periods=5, flag_incomplete_only=True, headers=None):
         """
         (1) Outputs a dictionary of DataFrames based duration of the periods
         (e.g. duration_of_periods = 7 for 7 days (or by week))
@@ -300,17 +862,18 @@ class DataFrameOfMSProject(object):
         (3) It will also produce the output dataframe based on a filter.  use this when wanting to 
         only output certain tasks (e.g. filter by resource name).  The filter uses regular expressions
         (4) to note whether to put all tasks or only incomplete tasks.  flag_incomplete_only=True surpressing output of complete tasks
+        (5) with lazy_columns=True the sheets hold the columns extracted so far, headers lists the deferred headers
+        to fetch for them first, e.g. headers=["Notes"]
         """
-        data_frame_collection = collections.OrderedDict()
-        df_filtered = self.project_data_frame
-
         if due_date is None:  # if no date offered, use todays date
             due_date = dt.datetime.today().date()
         else:
             due_date = dt.datetime.strptime(due_date, "%d/%m/%Y").date()
         
-        if flag_incomplete_only is True:
-            df_filtered=df_filtered[df_filtered["% Complete"] != "100%"]     
+        # fetch the deferred headers (lazy_columns) the sheets are asked to hold, filter_mask fetches the one filtered on
+        self.__require(headers)
+        # filter the tasks once, before they are split into periods
+        df_filtered = self.filter_tasks(header_to_filter, filter_text, flag_incomplete_only)
 
         """Process the periods"""
         self.logger.info("dueDate = %s", due_date)
@@ -321,30 +884,18 @@ class DataFrameOfMSProject(object):
         self.logger.info("Number of Periods = %s", num_of_periods)
         self.logger.info("Flag = %s", flag_incomplete_only)
         
-        key="Overdue"
-        data_frame_collection[key] = df_filtered[df_filtered["Finish"] <= due_date]
-        
-        date = due_date + dt.timedelta(days = 1)
-        self.logger.info("due_date = %s",due_date)
-        self.logger.info("date = %s",date)
-        
         # create worksheet for each period (other than "OverDue")
-        for reportingWindow in range(0, num_of_periods-1):
-            from_date = date
-            to_date = date + dt.timedelta(days = duration_of_periods-1)
-            
-            # create sheet name based on period range
-            key = str(from_date - dt.timedelta(days=0)) + "<>" + str(to_date - dt.timedelta(days=0))
-            self.logger.info("key = %s", key)
+        buckets = PeriodBuckets(due_date, duration_of_periods, num_of_periods-1)
+        self.logger.info("keys = %s", buckets.keys)
 
-            # filter for tasks between the date range
-            data_frame_collection[key] = df_filtered[(df_filtered["Finish"] >= from_date) &
-                                                     (df_filtered["Finish"] <= to_date)]
-            
-            date = to_date + dt.timedelta(days=1)
+        # filter for tasks finishing in each date range
+        with self.__metrics.phase("bucketing"):
+            data_frame_collection = buckets.finishing(df_filtered)
+        self.__metrics.count("reports")
         return data_frame_collection
     def output_dictionary_of_data_frames_WIP(self, due_date=None, header_to_filter=None, filter_text=None,
-                                             duration_of_periods=7, num_of_periods=5, flag_incomplete_only=True, flag_OUTPUT_WIP_COLUMN=True):
+                                             duration_of_periods=7, num_of_periods=5, flag_incomplete_only=True, flag_OUTPUT_WIP_COLUMN=True,
+                                             headers=None):
         """
         (1) Outputs a dictionary of DataFrames based duration of the periods
         (e.g. duration_of_periods = 7 for 7 days (or by week))
@@ -352,17 +903,19 @@ class DataFrameOfMSProject(object):
         (3) It will also produce the output dataframe based on a filter.  use this when wanting to 
         only output certain tasks (e.g. filter by resource name).  The filter uses regular expressions
         (4) to note whether to put all tasks or only incomplete tasks.  flag_incomplete_only=True surpressing output of complete tasks
+        (5) with lazy_columns=True the sheets hold the columns extracted so far, headers lists the deferred headers
+        to fetch for them first, e.g. headers=["Notes"]
         """
-        data_frame_collection = collections.OrderedDict()
-        df_filtered = self.project_data_frame
         self.logger.debug("Entered : output_dictionary_of_data_frames_WIP")
         if due_date is None:  # if no date offered, use todays date
             due_date = dt.datetime.today().date()
         else:
             due_date = dt.datetime.strptime(due_date, "%d/%m/%Y").date()
 
-        if flag_incomplete_only is True:
-            df_filtered=df_filtered[df_filtered["% Complete"] != "100%"]     
+        # fetch the deferred headers (lazy_columns) the sheets are asked to hold, filter_mask fetches the one filtered on
+        self.__require(headers)
+        # filter the tasks once, before they are split into periods
+        df_filtered = self.filter_tasks(header_to_filter, filter_text, flag_incomplete_only)
 
         """Process the periods"""
         self.logger.info("dueDate = %s", due_date)
@@ -373,41 +926,103 @@ class DataFrameOfMSProject(object):
         self.logger.info("Number of Periods = %s", num_of_periods)
         self.logger.info("Flag = %s", flag_incomplete_only)
 
-        key="Overdue"
-        data_frame_collection[key] = df_filtered[df_filtered["Finish"] <= due_date]
-
-        date = due_date + dt.timedelta(days = 1)
-        self.logger.info("due_date = %s",due_date)
-        self.logger.info("date = %s",date)        
-
         # create worksheet for each period (other than "OverDue")
-        for reportingWindow in range(0, num_of_periods):
-            from_date = date
-            to_date = date + dt.timedelta(days = duration_of_periods-1)
-            self.logger.info("Inside reportingWindow: from_date = %s",from_date)
-            self.logger.info("Inside reportingWindow: to_date = %s",to_date)
-            # create sheet name based on period range
-            key = str(from_date - dt.timedelta(days=0)) + "<>" + str(to_date - dt.timedelta(days=0))
-            self.logger.info("key = %s", key)
-            # filter for tasks between the date range
-            df_temp=df_filtered.copy(deep=True)
-            
-            df_temp=df_temp[((df_temp["Start"] >= from_date) & (df_temp["Start"] <= to_date) & (df_temp["Finish"]>=from_date)) |
-                        ((df_temp["Start"] <= from_date) & (df_temp["Finish"] >= to_date) & (df_temp["Finish"]>=to_date) & (df_temp["Start"]<=to_date)) |
-                        ((df_temp["Start"] <=from_date) & (df_temp["Finish"]>=from_date) & (df_temp["Finish"]<=to_date)& (df_temp["Start"]<=to_date))]
-        
-            self.logger.debug("flag_OUTPUT_WIP_COLUMN = %s",flag_OUTPUT_WIP_COLUMN)
-            if flag_OUTPUT_WIP_COLUMN:
-                df_temp["WIP"]="WIP"
-                df_temp.ix[df_temp["Start"] >= from_date,"WIP"]="Starting in Period"
-                df_temp.ix[df_temp["Finish"]<to_date,"WIP"]="Finishing in Period"
-                df_temp.ix[(df_temp["Start"] >= from_date)&(df_temp["Finish"]<=to_date),"WIP"]="Starting & Finishing in Period"
-                      
-                self.logger.debug("to_date = %s",to_date)
-                self.logger.info("Added WIP Column")
-            data_frame_collection[key] = df_temp.copy(deep=True)
-            date = to_date + dt.timedelta(days=1)   
+        buckets = PeriodBuckets(due_date, duration_of_periods, num_of_periods)
+        self.logger.info("keys = %s", buckets.keys)
+
+        # filter for tasks in progress in each date range, in a single pass over the tasks
+        self.logger.debug("flag_OUTPUT_WIP_COLUMN = %s",flag_OUTPUT_WIP_COLUMN)
+        with self.__metrics.phase("bucketing"):
+            data_frame_collection = buckets.wip(df_filtered, flag_OUTPUT_WIP_COLUMN)
+        self.__metrics.count("reports")
         return data_frame_collection
+
+    def output_dictionary_of_data_frames_by_resource(self, report="WIP", due_date=None, header_to_filter=None, filter_text=None,
+                                                     duration_of_periods=7, num_of_periods=5, flag_incomplete_only=True,
+                                                     flag_OUTPUT_WIP_COLUMN=True, headers=None):
+        """
+        Outputs, for every resource, the dictionary of DataFrames output_dictionary_of_data_frames_WIP (report="WIP")
+        or output_dictionary_of_data_frames_FINISHING (report="FINISHING") would give when filtering
+        "Resource Names" on that resource, in one pass: the tasks are filtered once, the resource names are
+        split once (the TaskFilter index) and each task is placed in its periods once.
+
+        Keyword Arguments:
+            report {str} -- "WIP" or "FINISHING" (default: {"WIP"})
+            the other arguments are the arguments of output_dictionary_of_data_frames_WIP / _FINISHING
+
+        Returns:
+            [OrderedDict] -- resource name (sorted) -> OrderedDict of "Overdue" and period DataFrames
+        """
+        self.logger.debug("Entered : output_dictionary_of_data_frames_by_resource")
+        if due_date is None:  # if no date offered, use todays date
+            due_date = dt.datetime.today().date()
+        else:
+            due_date = dt.datetime.strptime(due_date, "%d/%m/%Y").date()
+        if report == "FINISHING":
+            num_of_periods -= 1  # as output_dictionary_of_data_frames_FINISHING
+
+        self.__require(["Resource Names"] + list(headers or []))
+        mask = self.filter_mask(header_to_filter, filter_text, flag_incomplete_only)
+        df_filtered = self.project_data_frame[mask]
+        rows, resources, names = self.__resource_pairs(mask)
+
+        buckets = PeriodBuckets(due_date, duration_of_periods, num_of_periods)
+        self.logger.info("report = %s, resources = %s, keys = %s", report, len(names), buckets.keys)
+        with self.__metrics.phase("bucketing"):
+            data_frame_collections = buckets.by_group(df_filtered, rows, resources, names, report, flag_OUTPUT_WIP_COLUMN)
+        self.__metrics.count("reports", len(data_frame_collections))
+        return data_frame_collections
+
+    def resource_loading(self, due_date=None, header_to_filter=None, filter_text=None, duration_of_periods=7,
+                         num_of_periods=5, flag_incomplete_only=True, weight_by_remaining=False):
+        """
+        Outputs the number of tasks each resource has in progress in each period, i.e. the number of rows
+        of each period of output_dictionary_of_data_frames_WIP filtered on the resource, without building them.
+
+        Keyword Arguments:
+            weight_by_remaining {bool} -- count each task as the fraction of it still to do, (100 - % Complete) / 100,
+                                          rather than 1 (default: {False})
+            the other arguments are the arguments of output_dictionary_of_data_frames_WIP
+
+        Returns:
+            [DataFrame] -- one row per resource (sorted by name), one column per period
+        """
+        self.logger.debug("Entered : resource_loading")
+        if due_date is None:  # if no date offered, use todays date
+            due_date = dt.datetime.today().date()
+        else:
+            due_date = dt.datetime.strptime(due_date, "%d/%m/%Y").date()
+
+        self.__require(["Resource Names"])
+        mask = self.filter_mask(header_to_filter, filter_text, flag_incomplete_only)
+        df_filtered = self.project_data_frame[mask]
+        rows, resources, names = self.__resource_pairs(mask)
+        weights = None
+        if weight_by_remaining:
+            weights = (100 - df_filtered["% Complete"].to_numpy(dtype=float)) / 100
+
+        buckets = PeriodBuckets(due_date, duration_of_periods, num_of_periods)
+        with self.__metrics.phase("bucketing"):
+            loading = buckets.loading(df_filtered, rows, resources, len(names), weights)
+        if weights is None:
+            loading = loading.astype(np.int64)
+        return pd.DataFrame(loading, index=pd.Index(names, name="Resource Names"), columns=buckets.keys)
+
+    def __resource_pairs(self, mask):
+        """returns the (task, resource) pairs of the tasks selected by mask: (row positions among the selected
+        tasks, resource numbers, resource names), the resources being numbered in name order"""
+        if "Resource Names" not in self.project_data_frame.columns:
+            raise ValueError("the project DataFrame has no Resource Names column, add it to the headers")
+        values, positions, indptr = self.task_filter.index("Resource Names")
+        row_in_filtered = np.cumsum(mask) - 1
+        resources = np.repeat(np.arange(len(values)), np.diff(indptr))
+        kept = mask[positions]
+        # number the resources of the selected tasks in name order
+        used = np.unique(resources[kept])
+        used = used[np.argsort(values[used].astype(str), kind="stable")]
+        resource_rank = np.full(len(values), -1, dtype=np.int64)
+        resource_rank[used] = np.arange(len(used))
+        return row_in_filtered[positions[kept]], resource_rank[resources[kept]], list(values[used])
             
 
 
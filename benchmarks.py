@@ -0,0 +1,164 @@
+"""Benchmark suite for building the flattened project dataframe, splitting it into reports and writing them.
+
+Runs on synthetic schedules (see syntheticProject) so that it can be run anywhere (no MSProject or Windows
+needed), and writes the results as JSON so runs can be compared to catch regressions, e.g.
+
+    python benchmarks.py
+    python benchmarks.py --sizes 1000 10000 --json results.json
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ProjectToExcelClasses import DataFrameOfMSProject, FieldExtractionPlan, flatten_tasks
+from scheduleRisk import ScheduleRisk
+from syntheticProject import SyntheticTaskSource, generate_tasks
+from writeExcel import excelReportWriter
+
+# the default schedule: 3 outline levels, 1.5 predecessors and up to 2 resources per task
+schedule = {"outline_depth": 3, "tasks_per_summary": 10, "dependency_density": 1.5, "resources_per_task": 2,
+            "num_of_resources": 50, "date_spread_days": 365, "max_duration_days": 20}
+due_date = "01/06/2018"
+
+
+def _timed(function, *args, **kwargs):
+    """returns (result, seconds) of function(*args, **kwargs)"""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def benchmark_frame_construction(size, **options):
+    """times DataFrameOfMSProject on a synthetic schedule of size tasks (generating the tasks is not timed),
+    returns (project, result dictionary)"""
+    source = SyntheticTaskSource(num_of_tasks=size, **dict(schedule, **options)).open()
+    tasks = source.tasks
+    source.open = lambda: source  # already generated
+    project, seconds = _timed(DataFrameOfMSProject, task_source=source)
+    return project, {"tasks": len(tasks), "seconds": seconds, "us_per_task": seconds / len(tasks) * 1e6,
+                     "frame_bytes": int(project.project_data_frame.memory_usage(deep=True).sum()),
+                     "metrics": project.metrics}
+
+
+def benchmark_reports(project, duration_of_periods=7, num_of_periods=5):
+    """times the FINISHING and WIP reports of project, returns (WIP report, result dictionary)"""
+    finishing, finishing_seconds = _timed(project.output_dictionary_of_data_frames_FINISHING, due_date,
+                                          duration_of_periods=duration_of_periods, num_of_periods=num_of_periods)
+    wip, wip_seconds = _timed(project.output_dictionary_of_data_frames_WIP, due_date,
+                              duration_of_periods=duration_of_periods, num_of_periods=num_of_periods)
+    return wip, {"finishing_seconds": finishing_seconds, "finishing_rows": sum(len(f) for f in finishing.values()),
+                 "wip_seconds": wip_seconds, "wip_rows": sum(len(f) for f in wip.values())}
+
+
+def benchmark_lazy_columns(size, **options):
+    """compares extracting every header up front with lazy_columns=True (only the core headers): the time to the
+    first WIP report (extraction and report, on the core columns when lazy), the time to a WIP report asking for
+    a deferred header (Notes) and the memory of the project dataframe before it, returns a result dictionary"""
+    results = {}
+    for name, lazy_columns in (("eager", False), ("lazy", True)):
+        source = SyntheticTaskSource(num_of_tasks=size, **dict(schedule, **options)).open()
+        source.open = lambda source=source: source  # already generated
+        started = time.perf_counter()
+        project = DataFrameOfMSProject(task_source=source, lazy_columns=lazy_columns)
+        project.output_dictionary_of_data_frames_WIP(due_date)
+        first_report_seconds = time.perf_counter() - started
+        frame_bytes = int(project.project_data_frame.memory_usage(deep=True).sum())
+        wip, notes_report_seconds = _timed(project.output_dictionary_of_data_frames_WIP, due_date, headers=["Notes"])
+        results[name] = {"first_report_seconds": first_report_seconds, "notes_report_seconds": notes_report_seconds,
+                         "frame_bytes": frame_bytes}
+    return results
+
+
+def benchmark_schedule_risk(project, iterations=200):
+    """times the Monte Carlo simulation of project and its outputs, returns a result dictionary"""
+    risk = ScheduleRisk(project, iterations=iterations)
+    samples, simulate_seconds = _timed(risk.simulate)
+    outputs, outputs_seconds = _timed(risk.output_dictionary_of_data_frames, due_date)
+    return {"iterations": iterations, "simulate_seconds": simulate_seconds, "outputs_seconds": outputs_seconds,
+            "summary_tasks": len(outputs["Summary Tasks"])}
+
+
+def benchmark_sheet_writing(dictionary_of_data_frames):
+    """times writing dictionary_of_data_frames to a formatted .xlsx file, returns a result dictionary"""
+    writer = excelReportWriter()
+    writer.date_cols = ["D:E"]
+    writer.wrap_text_cols_ColWidth_medium = ["C"]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.xlsx")
+        result, seconds = _timed(writer.writeExcel, path, dictionary_of_data_frames)
+        file_bytes = os.path.getsize(path)
+    rows = sum(len(f) for f in dictionary_of_data_frames.values())
+    return {"seconds": seconds, "rows": rows, "us_per_row": seconds / max(rows, 1) * 1e6, "file_bytes": file_bytes}
+
+
+def benchmark_flatten_tasks(size):
+    """times flatten_tasks alone (no task source, header check or logging set up) on size tasks,
+    returns a result dictionary"""
+    headers = DataFrameOfMSProject.resolve_headers(None)
+    tasks = generate_tasks(size, **schedule)
+    plan = FieldExtractionPlan(headers, lambda field_name: field_name, typed_fields=SyntheticTaskSource.typed_fields)
+    result, seconds = _timed(flatten_tasks, tasks, plan)
+    return {"seconds": seconds, "us_per_task": seconds / len(tasks) * 1e6}
+
+
+def benchmark_dtypes(project, repeat=20):
+    """compares the typed dataframe of project with the same dataframe held as text (object columns, as before),
+    returns a dictionary of the memory used (bytes) and the time (seconds) taken by the report filters of each"""
+    typed = project.project_data_frame
+    text = typed.astype(object)
+    text["% Complete"] = typed["% Complete"].astype(str) + "%"
+    due = dt.datetime(2018, 6, 1)
+    results = {}
+    for name, frame, incomplete in (("typed", typed, lambda f: f["% Complete"] < 100),
+                                    ("object", text, lambda f: f["% Complete"] != "100%")):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            frame[incomplete(frame) & (frame["Finish"] <= due)]
+        results[name] = {"bytes": int(frame.memory_usage(deep=True).sum()),
+                         "filter_seconds": (time.perf_counter() - started) / repeat}
+    return results
+
+
+def run(sizes=(1000, 10000, 100000)):
+    """runs the suite for each size, returns the results as a dictionary"""
+    results = {"started": dt.datetime.now().isoformat(timespec="seconds"),
+               "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                               "pandas": pd.__version__, "numpy": np.__version__},
+               "schedule": schedule, "due_date": due_date, "sizes": []}
+    for size in sizes:
+        project, construction = benchmark_frame_construction(size)
+        wip, reports = benchmark_reports(project)
+        results["sizes"].append({"tasks": size, "frame_construction": construction,
+                                 "flatten_tasks": benchmark_flatten_tasks(size), "dtypes": benchmark_dtypes(project),
+                                 "reports": reports,
+                                 "lazy_columns": benchmark_lazy_columns(size),
+                                 "schedule_risk": benchmark_schedule_risk(project),
+                                 "sheet_writing": benchmark_sheet_writing(wip)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="numbers of tasks")
+    parser.add_argument("--json", help="file to write the results to (default: print them)")
+    arguments = parser.parse_args()
+
+    results = run(arguments.sizes)
+    for result in results["sizes"]:
+        print("%7d tasks  frame %8.3f s (%6.2f us/task)  FINISHING %7.3f s  WIP %7.3f s  sheets %8.3f s (%d rows)"
+              % (result["tasks"], result["frame_construction"]["seconds"], result["frame_construction"]["us_per_task"],
+                 result["reports"]["finishing_seconds"], result["reports"]["wip_seconds"],
+                 result["sheet_writing"]["seconds"], result["sheet_writing"]["rows"]), file=sys.stderr)
+    if arguments.json:
+        with open(arguments.json, "w") as f:
+            json.dump(results, f, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
@@ -0,0 +1,173 @@
+"""Project wide task dependency graph, built once while the tasks are extracted.
+
+Tasks are numbered 0..n-1 in the order they were added and the links are held as compressed
+adjacency arrays (indptr/indices, as in scipy.sparse.csr_matrix) in both directions, so the
+graph queries are numpy operations over whole frontiers of tasks rather than per task lookups.
+"""
+import re
+
+import numpy as np
+
+
+def _neighbours(indptr, indices, nodes):
+    """returns the concatenated adjacency lists of nodes"""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[np.repeat(starts, counts) + offsets]
+
+
+class DependencyGraph(object):
+    """Predecessor links between tasks, keyed by Unique ID
+
+    Build it by adding every task (and the Unique IDs of its predecessors) in project order:
+
+        graph = DependencyGraph()
+        graph.add_task(unique_id, name, predecessor_unique_ids)
+        graph.predecessors(unique_id)
+    """
+    # a predecessor as rendered in the Predecessors column, "UniqueID-Name"
+    rendered_predecessor = re.compile(r"(?:^|, )(\d+)-(.*?)(?=, \d+-|$)")
+
+    def __init__(self):
+        self.__positions = {}
+        self.__unique_ids = []
+        self.__names = []
+        self.__links_from = []
+        self.__links_to = []
+        self.__arrays = None
+
+    def add_task(self, unique_id, name, predecessor_unique_ids=()):
+        """adds (or names) a task and the links from its predecessors"""
+        position = self.__position(unique_id)
+        self.__names[position] = name
+        for predecessor in predecessor_unique_ids:
+            if predecessor != unique_id:  # a task can have multiple references to itself, this removes them
+                self.__links_from.append(self.__position(predecessor))
+                self.__links_to.append(position)
+        self.__arrays = None
+
+    def __position(self, unique_id):
+        position = self.__positions.get(unique_id)
+        if position is None:
+            position = self.__positions[unique_id] = len(self.__unique_ids)
+            self.__unique_ids.append(unique_id)
+            self.__names.append("")
+        return position
+
+    @classmethod
+    def from_frame(cls, project_data_frame):
+        """returns the graph of the Predecessors column of a project dataframe (e.g. one loaded from the cache)"""
+        graph = cls()
+        names = project_data_frame["Name"] if "Name" in project_data_frame.columns else None
+        for position, (unique_id, predecessors) in enumerate(project_data_frame["Predecessors"].items()):
+            links = cls.rendered_predecessor.findall(predecessors) if isinstance(predecessors, str) else []
+            for predecessor, name in links:
+                if int(predecessor) not in graph.__positions:
+                    graph.add_task(int(predecessor), name)
+            graph.add_task(int(unique_id), "" if names is None else names.iat[position],
+                           [int(predecessor) for predecessor, name in links])
+        return graph
+
+    @property
+    def unique_ids(self):
+        """returns the array of the Unique IDs of the tasks"""
+        return self.__build()["unique_ids"]
+
+    def links(self):
+        """returns the links as two arrays of Unique IDs, (predecessors, tasks), grouped by task"""
+        arrays = self.__build()
+        tasks = np.repeat(np.arange(len(arrays["unique_ids"])), np.diff(arrays["pred_indptr"]))
+        return arrays["unique_ids"][arrays["pred_indices"]], arrays["unique_ids"][tasks]
+
+    def name(self, unique_id):
+        """returns the name of a task"""
+        return self.__names[self.__positions[unique_id]]
+
+    def predecessors(self, unique_id):
+        """returns the Unique IDs of the direct predecessors of a task"""
+        return self.__query(unique_id, "pred_indptr", "pred_indices", transitive=False)
+
+    def successors(self, unique_id):
+        """returns the Unique IDs of the tasks directly following a task"""
+        return self.__query(unique_id, "succ_indptr", "succ_indices", transitive=False)
+
+    def upstream(self, unique_id):
+        """returns the Unique IDs of all the tasks a task depends on, directly or not"""
+        return self.__query(unique_id, "pred_indptr", "pred_indices", transitive=True)
+
+    def downstream(self, unique_id):
+        """returns the Unique IDs of all the tasks depending on a task, directly or not, i.e. what it blocks"""
+        return self.__query(unique_id, "succ_indptr", "succ_indices", transitive=True)
+
+    def topological_levels(self):
+        """returns an array with the level of every task (in unique_ids order), a task's level being one more
+        than the highest level of its predecessors (0 for tasks without predecessors)
+
+        Raises:
+            ValueError -- the links contain a loop
+        """
+        arrays = self.__build()
+        num_of_tasks = len(arrays["unique_ids"])
+        remaining = np.diff(arrays["pred_indptr"])
+        level = np.full(num_of_tasks, -1, dtype=np.int64)
+        frontier = np.flatnonzero(remaining == 0)
+        depth = 0
+        while len(frontier):
+            level[frontier] = depth
+            followers = _neighbours(arrays["succ_indptr"], arrays["succ_indices"], frontier)
+            remaining -= np.bincount(followers, minlength=num_of_tasks)
+            frontier = np.unique(followers[remaining[followers] == 0])
+            depth += 1
+        if (level < 0).any():
+            raise ValueError("The task links contain a loop through Unique IDs %s" %
+                             arrays["unique_ids"][level < 0].tolist())
+        return level
+
+    def topological_order(self):
+        """returns the Unique IDs ordered so that every task comes after its predecessors"""
+        return self.unique_ids[np.argsort(self.topological_levels(), kind="stable")]
+
+    def render_predecessors(self, unique_ids):
+        """returns the Predecessors column for unique_ids, "UniqueID-Name" of each predecessor separated by ", " """
+        arrays = self.__build()
+        names = self.__names
+        indptr, indices = arrays["pred_indptr"], arrays["pred_indices"]
+        rendered = []
+        for unique_id in unique_ids:
+            position = self.__positions.get(unique_id)
+            if position is None:
+                rendered.append("")
+                continue
+            rendered.append(", ".join(str(self.__unique_ids[p]) + "-" + str(names[p])
+                                      for p in indices[indptr[position]:indptr[position + 1]]))
+        return rendered
+
+    def __query(self, unique_id, indptr_name, indices_name, transitive):
+        arrays = self.__build()
+        indptr, indices = arrays[indptr_name], arrays[indices_name]
+        position = self.__positions[unique_id]
+        if not transitive:
+            return arrays["unique_ids"][indices[indptr[position]:indptr[position + 1]]]
+        reached = np.zeros(len(arrays["unique_ids"]), dtype=bool)
+        frontier = np.array([position])
+        while len(frontier):
+            frontier = _neighbours(indptr, indices, frontier)
+            frontier = np.unique(frontier[~reached[frontier]])
+            reached[frontier] = True
+        reached[position] = False
+        return arrays["unique_ids"][reached]
+
+    def __build(self):
+        """builds the adjacency arrays (once, after the last task has been added)"""
+        if self.__arrays is None:
+            num_of_tasks = len(self.__unique_ids)
+            links_from = np.array(self.__links_from, dtype=np.int64)
+            links_to = np.array(self.__links_to, dtype=np.int64)
+            arrays = {"unique_ids": np.array(self.__unique_ids, dtype=np.int64)}
+            for direction, key, value in (("pred", links_to, links_from), ("succ", links_from, links_to)):
+                order = np.argsort(key, kind="stable")
+                arrays[direction + "_indptr"] = np.concatenate(([0], np.cumsum(np.bincount(key, minlength=num_of_tasks))))
+                arrays[direction + "_indices"] = value[order]
+            self.__arrays = arrays
+        return self.__arrays
@@ -1,16 +1,23 @@
 import pickle
 import pandas as pd
-import win32com.client as win32
+try:
+    import win32com.client as win32
+except ImportError:
+    # only available on Windows with pywin32 installed, needed by excelFile/formatExcel only
+    win32 = None
 import os
 import logging
-import logging.handlers
-import datetime as dt
+import time
+
+from runMetrics import RunMetrics, set_up_logger
 
 class excelFormatColumns():
         
     def __init__(self):
         self.set_up_Logger()
         self.logger.info("Initiation")
+        # time spent opening, writing and formatting workbooks ("seconds") and the "counts" of sheets and rows
+        self.metrics = RunMetrics()
         
         self.__wrap_text_cols_ColWidth_small=[]
         self.__wrap_text_cols_ColWidth_medium=[]
@@ -21,33 +28,21 @@ class excelFormatColumns():
         self.colWidths=[30,50,80] #small, medium and large col widths
 
     def set_up_Logger(self):
-        # delete old log
-        now=dt.datetime.now().strftime("%Y-%m-%d %H-%M-%S")
-        
-        # create logger
-        self.logger = logging.getLogger('Log')
-        self.logger.setLevel(logging.DEBUG)         
-        # create formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)-4s - %(levelname)-8s - function: %(funcName)-15s LineNum: %(lineno)-5d - %(message)s',
-                                          datefmt='%m-%d-%Y %H:%M')
-        logpath="log/"+now+__name__
-        handler = logging.handlers.RotatingFileHandler(logpath+".log", maxBytes=1000000, backupCount=5)  
-        
-        handler.setLevel(logging.DEBUG)
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
-        self.logger.addHandler(handler)
-            
+        # the log file handler is only attached once per process (see runMetrics.set_up_logger), the level
+        # is left to the caller: writers are created on worker threads while projects are extracted
+        self.logger = set_up_logger(None, __name__)
         return
         
     def excelFile(self,xlPath):
-        self.excelApp = win32.gencache.EnsureDispatch("Excel.Application")
-        self.wb = self.excelApp.Workbooks.Open(xlPath)
-        self.excelApp.Visible = False
+        with self.metrics.phase("excel open"):
+            self.excelApp = win32.gencache.EnsureDispatch("Excel.Application")
+            self.wb = self.excelApp.Workbooks.Open(xlPath)
+            self.excelApp.Visible = False
         self.logger.info("%s",xlPath)
     
     def formatExcel(self, listOfSheets):
         self.logger.debug("Processing these Worksheets %s",listOfSheets)
+        started = time.perf_counter()
         for sheet in reversed(listOfSheets):
             self.logger.debug("process sheet %s",sheet)
             ws = self.wb.Worksheets(sheet)
@@ -76,6 +71,8 @@ class excelFormatColumns():
             ws.Rows.VerticalAlignment = -4160
         
         self.wb.Close(SaveChanges=1)
+        self.metrics.add_time("excel format", time.perf_counter() - started)
+        self.metrics.count("sheets formatted", len(listOfSheets))
         return 
     
     @property    
@@ -0,0 +1,214 @@
+"""Pool of warm MSProject.Application instances, projects opened read-only and closed without saving.
+
+Starting MS Project takes seconds, so the pool keeps its application instances running between
+projects: a project is opened in a leased instance, read, closed without saving and the instance
+returned to the pool for the next project.
+
+    pool = MSProjectSessionPool(size=1)
+    project = DataFrameOfMSProject(headers, r"C:/path/to/MyProjectFile.mpp", session_pool=pool)
+    ...
+    pool.close()  # quits the instances
+    pool.stats    # leases, returns, wait and hold times...
+
+The pool only uses this part of the MSProject.Application interface, which a fake (e.g.
+syntheticProject.SyntheticApplication) can implement to run it without MS Project:
+
+    DisplayAlerts                                  -- settable
+    FileOpenEx(Name, ReadOnly)                     -- opens a project file and makes it the ActiveProject
+    ActiveProject                                  -- the open project (Tasks)
+    FileCloseEx(Save)                              -- closes the active project (Save=pjDoNotSave)
+    FieldNameToFieldConstant(FieldName)
+    Quit(SaveChanges)                              -- quits the application (SaveChanges=pjDoNotSave)
+
+win32com objects belong to the thread that created them, use a pool from one thread (or a pool per thread).
+"""
+try:
+    import win32com.client
+except ImportError:
+    # only available on Windows with pywin32 installed
+    win32com = None
+import collections
+import contextlib
+import logging
+import queue
+import time
+
+# PjSaveType.pjDoNotSave of the MSProject object model
+pjDoNotSave = 0
+
+
+def dispatch_application():
+    """returns a new MSProject.Application instance"""
+    if win32com is None:
+        raise RuntimeError("win32com is not available, MS Project files can only be opened on Windows")
+    return win32com.client.DispatchEx("MSProject.Application")
+
+
+def open_read_only(application, project_file):
+    """opens project_file read-only in application and returns the project"""
+    application.DisplayAlerts = False
+    try:
+        application.FileOpenEx(Name=project_file, ReadOnly=True)
+        return application.ActiveProject
+    finally:
+        application.DisplayAlerts = True
+
+
+def close_without_saving(application):
+    """closes the active project of application, discarding any changes (nothing is written to the file)"""
+    application.DisplayAlerts = False
+    try:
+        application.FileCloseEx(pjDoNotSave)
+    finally:
+        application.DisplayAlerts = True
+
+
+class MSProjectSessionPool(object):
+
+    def __init__(self, size=1, application_factory=dispatch_application, logger=None, lease_timeout=None):
+        """Keeps up to size MSProject.Application instances (sessions) running, leased one at a time
+
+        Keyword Arguments:
+            size {int} -- maximum number of application instances (default: {1})
+            application_factory {function} -- returns a new application instance (default: {dispatch_application})
+            logger {logging.Logger} -- logger to report to (default: {None}, uses the 'Log' logger)
+            lease_timeout {float} -- seconds a lease waits for an instance to be given back before raising
+                                     a RuntimeError (default: {None}, waits for ever)
+        """
+        self.logger = logger if logger is not None else logging.getLogger('Log')
+        self.size = size
+        self.application_factory = application_factory
+        self.lease_timeout = lease_timeout
+        self.__idle = queue.LifoQueue()  # the most recently used (warmest) instance first
+        self.__created = 0
+        self.__leased_at = {}
+        self.__stats = collections.Counter()
+        self.__seconds = collections.defaultdict(float)
+
+    def warm_up(self):
+        """starts the instances not started yet, so the first leases do not wait for MS Project to start"""
+        while self.__created < self.size:
+            self.__idle.put(self.__create())
+        return self
+
+    def lease(self, timeout=None):
+        """returns an application instance, starting one if none is idle and the pool is not full,
+        otherwise waits (up to timeout seconds, lease_timeout if None) for one to be given back
+
+        Raises:
+            RuntimeError -- no instance was given back within the timeout
+        """
+        if timeout is None:
+            timeout = self.lease_timeout
+        started = time.perf_counter()
+        try:
+            application = self.__idle.get_nowait()
+        except queue.Empty:
+            if self.__created < self.size:
+                application = self.__create()
+            else:
+                try:
+                    application = self.__idle.get(timeout=timeout)
+                except queue.Empty:
+                    self.__stats["lease timeouts"] += 1
+                    raise RuntimeError("No MS Project session was given back within %s s" % timeout)
+        waited = time.perf_counter() - started
+        self.__stats["leases"] += 1
+        self.__seconds["lease_wait_seconds"] += waited
+        self.__seconds["max_lease_wait_seconds"] = max(self.__seconds["max_lease_wait_seconds"], waited)
+        self.__leased_at[id(application)] = time.perf_counter()
+        self.logger.info("Leased MS Project session after %.3f s", waited)
+        return application
+
+    def give_back(self, application, broken=False):
+        """returns a leased application instance to the pool, a broken instance is quit and replaced when needed"""
+        held = time.perf_counter() - self.__leased_at.pop(id(application), time.perf_counter())
+        self.__stats["returns"] += 1
+        self.__seconds["lease_held_seconds"] += held
+        self.logger.info("Returned MS Project session after %.3f s", held)
+        if broken:
+            self.__quit(application)
+        else:
+            self.__idle.put(application)
+
+    @contextlib.contextmanager
+    def session(self, project_file):
+        """leases an application, opens project_file read-only and yields (application, project),
+        then closes the project without saving and gives the application back (discarded if the body raised)"""
+        application = self.lease()
+        try:
+            project = self.open_project(application, project_file)
+        except Exception:
+            self.give_back(application, broken=True)
+            raise
+        broken = True
+        try:
+            yield application, project
+            broken = False
+        finally:
+            self.close_project(application, broken)
+
+    def open_project(self, application, project_file):
+        """opens project_file read-only in a leased application, returns the project"""
+        started = time.perf_counter()
+        project = open_read_only(application, project_file)
+        self.__seconds["open_seconds"] += time.perf_counter() - started
+        self.__stats["opens"] += 1
+        return project
+
+    def close_project(self, application, broken=False):
+        """closes the project of a leased application without saving it and gives the application back,
+        a broken application (e.g. after a COM error reading the project) is quit rather than reused"""
+        started = time.perf_counter()
+        try:
+            close_without_saving(application)
+        except Exception:
+            self.logger.exception("Failed to close the project, discarding the MS Project session")
+            self.give_back(application, broken=True)
+            return
+        finally:
+            self.__seconds["close_seconds"] += time.perf_counter() - started
+        self.give_back(application, broken)
+
+    def close(self):
+        """quits the idle application instances"""
+        while True:
+            try:
+                application = self.__idle.get_nowait()
+            except queue.Empty:
+                break
+            self.__quit(application)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def stats(self):
+        """returns a dictionary of the number of sessions started, leases, returns, opens, and the seconds spent
+        starting sessions, waiting for a lease, holding leases, opening and closing projects"""
+        stats = {name: self.__stats[name] for name in ("started", "leases", "returns", "opens", "quits",
+                                                       "lease timeouts")}
+        for name in ("start_seconds", "lease_wait_seconds", "max_lease_wait_seconds", "lease_held_seconds",
+                     "open_seconds", "close_seconds"):
+            stats[name] = self.__seconds[name]
+        return stats
+
+    def __create(self):
+        started = time.perf_counter()
+        application = self.application_factory()
+        self.__created += 1
+        self.__stats["started"] += 1
+        self.__seconds["start_seconds"] += time.perf_counter() - started
+        self.logger.info("Started MS Project session %s of %s", self.__created, self.size)
+        return application
+
+    def __quit(self, application):
+        self.__created -= 1
+        self.__stats["quits"] += 1
+        try:
+            application.Quit(pjDoNotSave)
+        except Exception:
+            self.logger.exception("Failed to quit MS Project session")
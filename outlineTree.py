@@ -0,0 +1,96 @@
+"""Outline (summary task) hierarchy of a project, held as parent pointer arrays."""
+import numpy as np
+import pandas as pd
+
+
+class OutlineTree(object):
+    """The summary tasks of a project as a tree of nodes numbered in the order they were added.
+    Node 0 is the root, standing for the project itself (the path of top level tasks is "").
+
+        tree = OutlineTree()
+        phase = tree.add_summary_task(0, "Phase 1", unique_id)
+        design = tree.add_summary_task(phase, "Design", unique_id)
+        tree.path(design)  # "Phase 1>Design"
+    """
+    separator = ">"
+
+    def __init__(self):
+        self.__names = [""]
+        self.__parents = [-1]
+        self.__unique_ids = [None]
+        self.__paths = {0: ""}
+
+    def __len__(self):
+        return len(self.__names)
+
+    def add_summary_task(self, parent, name, unique_id=None):
+        """adds a summary task below node parent and returns its node"""
+        self.__names.append(name)
+        self.__parents.append(parent)
+        self.__unique_ids.append(unique_id)
+        return len(self.__names) - 1
+
+    @classmethod
+    def from_paths(cls, paths):
+        """returns the tree of a list of summary task paths ("Level 1>Level 2"), e.g. the SummaryTask column of a cached dataframe"""
+        tree = cls()
+        nodes = {"": 0}
+        for path in paths:
+            if not isinstance(path, str) or path in nodes:
+                continue
+            parent = 0
+            names = path.split(cls.separator)
+            for depth in range(1, len(names) + 1):
+                prefix = cls.separator.join(names[:depth])
+                if prefix not in nodes:
+                    nodes[prefix] = tree.add_summary_task(parent, names[depth - 1])
+                parent = nodes[prefix]
+        return tree
+
+    @property
+    def parents(self):
+        """returns the parent pointer array (-1 for the root)"""
+        return np.array(self.__parents, dtype=np.int64)
+
+    def name(self, node):
+        return self.__names[node]
+
+    def path(self, node):
+        """returns the path of the summary tasks down to node, "Level 1>Level 2>Level 3" (rendered once per node)"""
+        path = self.__paths.get(node)
+        if path is None:
+            parent = self.__parents[node]
+            path = self.__names[node] if parent == 0 else self.path(parent) + self.separator + self.__names[node]
+            self.__paths[node] = path
+        return path
+
+    def categorical(self, nodes):
+        """returns the summary task paths of an array of nodes as a pandas Categorical"""
+        path_codes, categories = pd.factorize(pd.Series([self.path(node) for node in range(len(self))], dtype=object))
+        return pd.Categorical.from_codes(path_codes[np.asarray(nodes, dtype=np.int64)], categories=categories)
+
+    def find(self, summary):
+        """returns the nodes of a summary task given by Unique ID (int), path ("Level 1>Level 2") or name"""
+        if isinstance(summary, (int, np.integer)):
+            return np.array([node for node, unique_id in enumerate(self.__unique_ids) if unique_id == summary], dtype=np.int64)
+        return np.array([node for node in range(1, len(self))
+                         if self.__names[node] == summary or self.path(node) == summary], dtype=np.int64)
+
+    def descendants(self, nodes):
+        """returns a boolean array marking nodes and every node below them"""
+        parents = self.parents
+        parents[0] = 0  # the root is its own parent so every walk ends there
+        selected = np.zeros(len(self), dtype=bool)
+        selected[nodes] = True
+        below = selected.copy()
+        ancestors = np.arange(len(self))
+        # walk every node up to the root, one level at a time
+        while (ancestors != 0).any():
+            ancestors = parents[ancestors]
+            below |= selected[ancestors]
+        return below
+
+    def paths_under(self, summary):
+        """returns the set of paths of summary and all the summary tasks below it"""
+        below = self.descendants(self.find(summary))
+        return {self.path(node) for node in np.flatnonzero(below)}
@@ -0,0 +1,242 @@
+"""Vectorised bucketing of project tasks into reporting periods.
+
+The periods run back to back from the day after the due date, each duration_of_periods days long
+and named "from_date<>to_date".  Each task is located against the sorted period boundaries with
+numpy.searchsorted, so every task is placed in all of its periods in a single pass over the tasks.
+"""
+import collections
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+
+def period_boundaries(due_date, duration_of_periods, num_of_periods):
+    """returns a list of (key, from_date, to_date) for the periods following due_date
+
+    Arguments:
+        due_date {datetime.date} -- the periods start the day after the due date
+        duration_of_periods {int} -- number of days in a period
+        num_of_periods {int} -- number of periods
+    """
+    periods = []
+    date = due_date + dt.timedelta(days=1)
+    for reportingWindow in range(0, num_of_periods):
+        from_date = date
+        to_date = date + dt.timedelta(days=duration_of_periods-1)
+        periods.append((str(from_date) + "<>" + str(to_date), from_date, to_date))
+        date = to_date + dt.timedelta(days=1)
+    return periods
+
+
+class PeriodBuckets(object):
+    """Reporting periods of a report, used to split a project dataframe into a dictionary of dataframes
+    (an "Overdue" dataframe followed by one dataframe per period).
+
+    Like the original reports, Start and Finish are compared against midnight at the start of the
+    from and to dates of each period.
+    """
+    wip_labels = np.array(["WIP", "Starting in Period", "Finishing in Period", "Starting & Finishing in Period"],
+                          dtype=object)
+
+    def __init__(self, due_date, duration_of_periods=7, num_of_periods=5):
+        """
+        Arguments:
+            due_date {datetime.date} -- tasks finishing on or before the due date are overdue
+
+        Keyword Arguments:
+            duration_of_periods {int} -- number of days in a period (default: {7})
+            num_of_periods {int} -- number of periods (default: {5})
+        """
+        self.due_date = due_date
+        self.periods = period_boundaries(due_date, duration_of_periods, num_of_periods)
+        self.keys = [key for key, from_date, to_date in self.periods]
+        self.from_dates = np.array([from_date for key, from_date, to_date in self.periods], dtype="datetime64[ns]")
+        self.to_dates = np.array([to_date for key, from_date, to_date in self.periods], dtype="datetime64[ns]")
+
+    @staticmethod
+    def _dates(frame, column):
+        return frame[column].to_numpy(dtype="datetime64[ns]")
+
+    def overdue(self, frame):
+        """returns the tasks of frame finishing on or before the due date"""
+        return frame[frame["Finish"] <= pd.Timestamp(self.due_date)]
+
+    def finishing_period(self, frame):
+        """returns an array with the number of the period each task finishes in (-1 when in none of them)"""
+        return self.period_of(self._dates(frame, "Finish"))
+
+    def period_of(self, finish):
+        """returns an array with the number of the period each finish date (datetime64[ns] array, of any shape)
+        is in (-1 when in none of them)"""
+        period = np.searchsorted(self.from_dates, finish, side="right") - 1
+        in_period = (period >= 0) & ~np.isnat(finish)
+        in_period[in_period] &= finish[in_period] <= self.to_dates[period[in_period]]
+        return np.where(in_period, period, -1)
+
+    def finishing(self, frame):
+        """returns an OrderedDict of the "Overdue" tasks followed by the tasks finishing in each period"""
+        data_frame_collection = collections.OrderedDict()
+        data_frame_collection["Overdue"] = self.overdue(frame)
+        period = self.finishing_period(frame)
+        positions = np.flatnonzero(period >= 0)
+        positions = positions[np.argsort(period[positions], kind="stable")]
+        self.__split(data_frame_collection, frame.take(positions), period[positions])
+        return data_frame_collection
+
+    def wip_periods(self, frame):
+        """returns the (task position, period number, WIP label number) of every period each task is in progress in.
+
+        A task is in progress in a period when it starts on or before its to date and finishes on or after
+        its from date.  The result is ordered by period, then by the position of the task in frame.
+        """
+        start = self._dates(frame, "Start")
+        finish = self._dates(frame, "Finish")
+        first, counts = self.wip_spans(frame)
+
+        positions = np.repeat(np.arange(len(frame)), counts)
+        period = np.repeat(first, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+        order = np.argsort(period, kind="stable")
+        positions = positions[order]
+        period = period[order]
+
+        task_start = start[positions]
+        task_finish = finish[positions]
+        starting = task_start >= self.from_dates[period]
+        label = np.select([starting & (task_finish <= self.to_dates[period]),
+                           task_finish < self.to_dates[period],
+                           starting], [3, 2, 1], default=0)
+        return positions, period, label
+
+    def wip_spans(self, frame):
+        """returns (first, counts): the first period each task is in progress in and the number of consecutive
+        periods it is in progress in (0 when in none of them, e.g. without a Start or Finish)"""
+        start = self._dates(frame, "Start")
+        finish = self._dates(frame, "Finish")
+        # first period ending on or after the start, last period beginning on or before the finish
+        first = np.searchsorted(self.to_dates, start, side="left")
+        last = np.searchsorted(self.from_dates, finish, side="right") - 1
+        counts = np.where(np.isnat(start) | np.isnat(finish), 0, np.maximum(last - first + 1, 0))
+        return first, counts
+
+    def loading(self, frame, rows=None, groups=None, num_of_groups=1, weights=None):
+        """returns a (num_of_groups, number of periods) array of the number of tasks in progress in each period,
+        per group (e.g. per resource) of the (task, group) pairs rows/groups, or for all the tasks when rows is None.
+
+        Each task adds its weight (1 by default) to a difference array at its first period and takes it off after
+        its last, a cumulative sum along the periods then gives the loading, in O(pairs + groups x periods).
+
+        Arguments:
+            frame {DataFrame} -- the (filtered) project dataframe
+
+        Keyword Arguments:
+            rows {array} -- row positions in frame of the (task, group) pairs (default: {None}, every task in group 0)
+            groups {array} -- group numbers of the pairs (default: {None})
+            num_of_groups {int} -- number of groups (default: {1})
+            weights {array} -- weight of each task of frame (default: {None}, 1 per task)
+        """
+        first, counts = self.wip_spans(frame)
+        if rows is None:
+            rows = np.arange(len(frame))
+            groups = np.zeros(len(frame), dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        groups = np.asarray(groups, dtype=np.int64)
+        in_progress = counts[rows] > 0
+        rows, groups = rows[in_progress], groups[in_progress]
+        weight = np.ones(len(rows)) if weights is None else np.asarray(weights, dtype=float)[rows]
+        width = len(self.keys) + 1
+        starts = groups * width + first[rows]
+        ends = starts + counts[rows]
+        difference = (np.bincount(starts, weight, minlength=num_of_groups * width)
+                      - np.bincount(ends, weight, minlength=num_of_groups * width))
+        return np.cumsum(difference.reshape(num_of_groups, width), axis=1)[:, :-1]
+
+    def wip(self, frame, flag_OUTPUT_WIP_COLUMN=True):
+        """returns an OrderedDict of the "Overdue" tasks followed by the tasks in progress in each period, with a
+        WIP column labelling them "WIP", "Starting in Period", "Finishing in Period" or "Starting & Finishing in Period"
+
+        All the periods are slices of one dataframe of (task, period) rows rather than copies of frame.
+        """
+        data_frame_collection = collections.OrderedDict()
+        data_frame_collection["Overdue"] = self.overdue(frame)
+        positions, period, label = self.wip_periods(frame)
+        in_progress = frame.take(positions)
+        if flag_OUTPUT_WIP_COLUMN:
+            in_progress["WIP"] = self.wip_labels[label]
+        self.__split(data_frame_collection, in_progress, period)
+        return data_frame_collection
+
+    def wip_long(self, frame):
+        """returns one dataframe of every (task, period) a task is in progress in, with Period and WIP columns"""
+        positions, period, label = self.wip_periods(frame)
+        in_progress = frame.take(positions)
+        in_progress["Period"] = pd.Categorical.from_codes(period, categories=self.keys)
+        in_progress["WIP"] = self.wip_labels[label]
+        return in_progress
+
+    def by_group(self, frame, rows, groups, group_names, report="WIP", flag_OUTPUT_WIP_COLUMN=True):
+        """returns an OrderedDict, keyed by group name, of the report dictionaries of the tasks of each group,
+        e.g. of each resource, placing every task in its periods once whatever the number of groups.
+
+        Arguments:
+            frame {DataFrame} -- the (filtered) project dataframe
+            rows {array} -- row positions in frame of the (task, group) pairs, e.g. one per task resource
+            groups {array} -- group numbers (indexes into group_names) of the pairs
+            group_names {list} -- the name of each group
+
+        Keyword Arguments:
+            report {str} -- "WIP" (tasks in progress in each period, see wip) or "FINISHING" (see finishing) (default: {"WIP"})
+            flag_OUTPUT_WIP_COLUMN {bool} -- add the WIP column to a "WIP" report (default: {True})
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        groups = np.asarray(groups, dtype=np.int64)
+        num_of_periods = len(self.keys)
+
+        # the periods of every task, ordered by task
+        if report == "WIP":
+            positions, period, label = self.wip_periods(frame)
+        else:
+            finishing = self.finishing_period(frame)
+            positions = np.flatnonzero(finishing >= 0)
+            period, label = finishing[positions], None
+        order = np.argsort(positions, kind="stable")
+        positions, period = positions[order], period[order]
+        if label is not None:
+            label = label[order]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(positions, minlength=len(frame)))))
+
+        # expand each (task, group) pair into the periods of the task, then order by group, period and task
+        starts = indptr[rows]
+        counts = indptr[rows + 1] - starts
+        entries = np.repeat(starts, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+        entry_groups = np.repeat(groups, counts)
+        order = np.lexsort((positions[entries], period[entries], entry_groups))
+        entries, entry_groups = entries[order], entry_groups[order]
+        in_progress = frame.take(positions[entries])
+        if label is not None and flag_OUTPUT_WIP_COLUMN:
+            in_progress["WIP"] = self.wip_labels[label[entries]]
+        bounds = np.searchsorted(entry_groups * num_of_periods + period[entries],
+                                 np.arange(len(group_names) * num_of_periods + 1), side="left")
+
+        # the overdue tasks of each group
+        overdue = (frame["Finish"] <= pd.Timestamp(self.due_date)).to_numpy()[rows]
+        order = np.lexsort((rows[overdue], groups[overdue]))
+        overdue_rows, overdue_groups = rows[overdue][order], groups[overdue][order]
+        overdue_frame = frame.take(overdue_rows)
+        overdue_bounds = np.searchsorted(overdue_groups, np.arange(len(group_names) + 1), side="left")
+
+        data_frame_collections = collections.OrderedDict()
+        for group, name in enumerate(group_names):
+            data_frame_collection = collections.OrderedDict()
+            data_frame_collection["Overdue"] = overdue_frame.iloc[overdue_bounds[group]:overdue_bounds[group + 1]]
+            for number, key in enumerate(self.keys):
+                block = group * num_of_periods + number
+                data_frame_collection[key] = in_progress.iloc[bounds[block]:bounds[block + 1]]
+            data_frame_collections[name] = data_frame_collection
+        return data_frame_collections
+
+    def __split(self, data_frame_collection, frame, period):
+        """adds the rows of frame (ordered by period) to data_frame_collection, one slice per period"""
+        bounds = np.searchsorted(period, np.arange(len(self.keys) + 1), side="left")
+        for number, key in enumerate(self.keys):
+            data_frame_collection[key] = frame.iloc[bounds[number]:bounds[number + 1]]
@@ -0,0 +1,121 @@
+"""On disk cache of the flattened project dataframes, so that an unchanged project file is not extracted again."""
+import collections
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import pathlib
+import time
+
+import pandas as pd
+
+
+class ProjectSnapshotCache(object):
+    # part of every key, bump when the layout or dtypes of the project dataframe change
+    snapshot_version = 2
+
+    def __init__(self, cache_dir="cache", max_bytes=500 * 1024 * 1024):
+        """Stores the finished project_data_frame of a project file keyed on the file (path, size,
+        modification time and content hash), the resolved headers and the tasks ignored.
+
+        Snapshots are written as Parquet files when pyarrow is installed (pickle files otherwise),
+        both keep the dtypes of the dataframe.  When the cache grows over max_bytes the least
+        recently used snapshots are removed.
+
+        Keyword Arguments:
+            cache_dir {str} -- directory holding the snapshots (default: {"cache"})
+            max_bytes {int} -- maximum size of the snapshots held (default: {500MB})
+        """
+        self.logger = logging.getLogger('Log')
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        if importlib.util.find_spec("pyarrow") is not None:
+            self.__suffix = ".parquet"
+        else:
+            self.__suffix = ".pkl"
+        self.__stats = collections.Counter()
+        self.__load_seconds = 0.0
+
+    def key(self, project_file, headers, UniqueIDs_to_Ignore, **options):
+        """returns the cache key of the project file extracted with headers, or None if project_file is not a file
+
+        Arguments:
+            project_file {str} -- full path to the project file
+            headers {list} -- resolved list of headers (see DataFrameOfMSProject.resolve_headers)
+            UniqueIDs_to_Ignore {list or set} -- Unique Task Ids of the tasks ignored
+            options -- any other extraction options changing the dataframe, e.g. prune_ignored_subtrees=True
+        """
+        path = pathlib.Path(project_file) if project_file else None
+        if path is None or not path.is_file():
+            return None
+        path = path.resolve()
+        stat = path.stat()
+        content_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                content_hash.update(chunk)
+        key = json.dumps([self.snapshot_version, str(path), stat.st_size, stat.st_mtime_ns, content_hash.hexdigest(),
+                          list(headers), sorted(set(UniqueIDs_to_Ignore)), sorted(options.items())], default=str)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """returns the cached dataframe for key, None on a miss"""
+        snapshot = self.__snapshot(key)
+        if key is None or not snapshot.is_file():
+            self.__stats["misses"] += 1
+            return None
+        started = time.perf_counter()
+        if self.__suffix == ".parquet":
+            frame = pd.read_parquet(snapshot)
+        else:
+            frame = pd.read_pickle(snapshot)
+        self.__load_seconds += time.perf_counter() - started
+        # mark as recently used for the eviction
+        os.utime(snapshot)
+        self.__stats["hits"] += 1
+        self.logger.info("Loaded project dataframe from cache %s", snapshot)
+        return frame
+
+    def store(self, key, frame):
+        """stores frame under key, then evicts the least recently used snapshots if the cache is too big"""
+        if key is None:
+            return
+        snapshot = self.__snapshot(key)
+        temp = snapshot.with_suffix(".tmp")
+        if self.__suffix == ".parquet":
+            frame.to_parquet(temp)
+        else:
+            frame.to_pickle(temp)
+        os.replace(temp, snapshot)
+        self.__stats["stores"] += 1
+        self.logger.info("Stored project dataframe in cache %s", snapshot)
+        self.evict()
+
+    def evict(self):
+        """removes the least recently used snapshots until the cache is no bigger than max_bytes"""
+        snapshots = sorted(self.cache_dir.glob("*" + self.__suffix), key=lambda p: p.stat().st_mtime)
+        size = sum(p.stat().st_size for p in snapshots)
+        while snapshots and size > self.max_bytes:
+            snapshot = snapshots.pop(0)
+            size -= snapshot.stat().st_size
+            snapshot.unlink()
+            self.__stats["evictions"] += 1
+            self.logger.info("Evicted %s from cache", snapshot)
+
+    def clear(self):
+        """removes all snapshots"""
+        for snapshot in self.cache_dir.glob("*" + self.__suffix):
+            snapshot.unlink()
+
+    @property
+    def stats(self):
+        """returns a dictionary of hits, misses, stores, evictions, the time spent loading hits and the size of the cache"""
+        stats = {name: self.__stats[name] for name in ("hits", "misses", "stores", "evictions")}
+        stats["load_seconds"] = self.__load_seconds
+        stats["bytes"] = sum(p.stat().st_size for p in self.cache_dir.glob("*" + self.__suffix))
+        return stats
+
+    def __snapshot(self, key):
+        return self.cache_dir / (str(key) + self.__suffix)
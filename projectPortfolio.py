@@ -0,0 +1,122 @@
+"""Extraction of many project files at once, each file in its own worker process."""
+import concurrent.futures
+import logging
+import traceback
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from ProjectToExcelClasses import DataFrameOfMSProject
+from projectTaskSources import task_source_for_file
+from runMetrics import flush_logger
+
+
+def _extract_project(project_file, headers, UniqueIDs_to_Ignore, logging_level, task_source_factory,
+                     prune_ignored_subtrees=False):
+    """runs in a worker process, returns (project dataframe, None) or (None, error message)"""
+    try:
+        project = DataFrameOfMSProject(headers=headers, logging_level=logging_level,
+                                       UniqueIDs_to_Ignore=UniqueIDs_to_Ignore,
+                                       prune_ignored_subtrees=prune_ignored_subtrees,
+                                       task_source=task_source_factory(project_file))
+        if project.project_data_frame is None:  # the errors were logged by DataFrameOfMSProject
+            return None, "headers invalid / not a project file"
+        return project.project_data_frame, None
+    except Exception:
+        return None, traceback.format_exc()
+    finally:
+        flush_logger()  # the worker process may end with os._exit, without running atexit
+
+
+def _concat_projects(frames, keys):
+    """returns the frames concatenated, indexed by (Project, UniqueID).  pd.concat turns categorical columns
+    whose categories differ from project to project into text, so these are given the union of the
+    categories of all the projects first (or made categorical again when some projects hold them as text)"""
+    frames = [frame.copy(deep=False) for frame in frames]
+    recategorize = []
+    for column in frames[0].columns:
+        categorical = [isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames if column in frame]
+        if all(categorical):
+            categories = union_categoricals([frame[column] for frame in frames if column in frame],
+                                            sort_categories=True).categories
+            for frame in frames:
+                if column in frame:
+                    frame[column] = frame[column].cat.set_categories(categories)
+        elif any(categorical):
+            recategorize.append(column)
+    portfolio = pd.concat(frames, keys=keys, names=["Project", "UniqueID"])
+    for column in recategorize:
+        portfolio[column] = portfolio[column].astype(object).astype("category")
+    return portfolio
+
+
+class DataFrameOfPortfolio(object):
+
+    def __init__(self, project_files, headers=None, logging_level="INFO", UniqueIDs_to_Ignore=[], max_workers=None,
+                 task_source_factory=task_source_for_file, prune_ignored_subtrees=False):
+        """Creates a Pandas dataframe of the "flattened" tasks of many project files, extracted in parallel
+        worker processes.  The dataframe is indexed by (Project, UniqueID) where Project is the project file
+        as given in project_files.  A file that fails to extract does not stop the others, its error is
+        recorded in errors instead.
+
+        Arguments:
+            project_files {list} -- full path strings to the project files (.mpp or .xml)
+
+        Keyword Arguments:
+            headers {list} -- List of headers using MSProject exact field names (default: {None})
+            logging_level {str} -- Options: "DEBUG" or "INFO" (default: {"INFO"})
+            UniqueIDs_to_Ignore {list, set or dict} -- Unique Task Ids of tasks to ignore in every file,
+                                                       or a dictionary of such lists keyed by project file (default: {[]})
+            max_workers {int} -- number of worker processes (default: {None}, one per CPU)
+            task_source_factory {function} -- returns an unopened TaskSource for a project file, must be picklable,
+                                              i.e. a module level function or class (default: {task_source_for_file})
+            prune_ignored_subtrees {bool} -- also ignore every task below an ignored summary task (default: {False})
+        """
+        self.logger = logging.getLogger('Log')
+        self.project_files = list(project_files)
+        self.__errors = {}
+        frames = {}
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for project_file in self.project_files:
+                if isinstance(UniqueIDs_to_Ignore, dict):
+                    ignore = UniqueIDs_to_Ignore.get(project_file, [])
+                else:
+                    ignore = UniqueIDs_to_Ignore
+                futures[executor.submit(_extract_project, project_file, headers, ignore, logging_level,
+                                        task_source_factory, prune_ignored_subtrees)] = project_file
+
+            for future in concurrent.futures.as_completed(futures):
+                project_file = futures[future]
+                try:
+                    frame, error = future.result()
+                except Exception:  # e.g. the worker process died
+                    frame, error = None, traceback.format_exc()
+                if error is None:
+                    self.logger.info("Extracted %s tasks from %s", len(frame), project_file)
+                    frames[project_file] = frame
+                else:
+                    self.logger.error("Failed to extract %s: %s", project_file, error)
+                    self.__errors[project_file] = error
+
+        # keep the order the project files were given in
+        extracted = [f for f in self.project_files if f in frames]
+        if extracted:
+            self.__projectDataFrame = _concat_projects([frames[f] for f in extracted], extracted)
+        else:
+            self.__projectDataFrame = pd.DataFrame()
+
+    @property
+    def project_data_frame(self):
+        """
+        returns the portfolio DataFrame indexed by (Project, UniqueID)
+        """
+        return self.__projectDataFrame
+
+    @property
+    def errors(self):
+        """
+        returns a dictionary of error messages keyed by the project files that could not be extracted
+        """
+        return self.__errors
@@ -0,0 +1,391 @@
+"""Task sources feeding DataFrameOfMSProject.
+
+A task source opens a project, exposes its tasks through the MSProject Task interface
+(UniqueID, Summary, OutlineLevel, Name, GetField, TaskDependencies, Assignments) and closes it again.
+
+    ComTaskSource   -- drives MSProject.Application through win32com (Windows with MS Project installed)
+    MspdiTaskSource -- reads a Project XML (MSPDI) file saved from MS Project, no MS Project needed
+"""
+import datetime as dt
+import logging
+import pathlib
+import re
+import xml.etree.ElementTree as ET
+
+from msProjectSessionPool import close_without_saving, dispatch_application, open_read_only, pjDoNotSave
+
+
+class TaskSource(object):
+    """Base class of the task sources, use as
+
+        source = SomeTaskSource(...).open()
+        for t in source.tasks:
+            t.GetField(source.field_constant("Name"))
+        source.close()
+    """
+    # fields read from a typed Task property (datetime, number) rather than as text through Task.GetField
+    typed_fields = {}
+
+    def __init__(self, name=None, logger=None):
+        self.name = name
+        self.logger = logger if logger is not None else logging.getLogger('Log')
+
+    def open(self):
+        """opens the project and returns the task source"""
+        return self
+
+    def close(self, broken=False):
+        """closes the project, broken after a failure reading it"""
+        return
+
+    @property
+    def tasks(self):
+        """returns an iterable of the project tasks (in outline order)"""
+        raise NotImplementedError
+
+    def field_constant(self, field_name):
+        """returns the constant to pass to Task.GetField for field_name, raises an exception if field_name is not valid"""
+        raise NotImplementedError
+
+    @staticmethod
+    def predecessor_unique_ids(t, com_calls=None):
+        """returns the Unique IDs of the predecessors of task t, counting the calls made in com_calls (a Counter)"""
+        unique_ids = [d.From.UniqueID for d in t.TaskDependencies]
+        if com_calls is not None:
+            com_calls["TaskDependencies"] += 1
+            com_calls["TaskDependency.From"] += 2 * len(unique_ids)
+        return unique_ids
+
+
+class ComTaskSource(TaskSource):
+    """Tasks read from a .mpp file through the MSProject.Application COM object.
+
+    The file is opened read-only and closed without saving.  Given a MSProjectSessionPool the
+    application is leased from the pool (and given back on close) instead of being started and quit.
+    """
+    # the Unique ID at the start of a link of the "Unique ID Predecessors" field, links to other projects
+    # ("<>\\path\\12") are left out
+    predecessor_link = re.compile(r"\s*(\d+)")
+    # a lag written with a decimal comma, e.g. "12FS+0,5 days"
+    decimal_comma_lag = re.compile(r"[+-]\d+,\d")
+    typed_fields = {"Start": "Start", "Finish": "Finish", "% Complete": "PercentComplete"}
+
+    def __init__(self, ms_project_file, logger=None, session_pool=None):
+        super().__init__(ms_project_file, logger)
+        self.session_pool = session_pool
+        self.application = None
+        self.project = None
+
+    def open(self):
+        """load MS Project File (read-only) and create reference to MS Project File object"""
+        self.logger.debug("Entered: ComTaskSource.open")
+        self.logger.info("path to MS Project file entered is %s", self.name)
+        if self.session_pool is not None:
+            self.application = self.session_pool.lease()
+            try:
+                self.project = self.session_pool.open_project(self.application, self.name)
+            except Exception:
+                self.session_pool.give_back(self.application, broken=True)
+                self.application = None
+                raise
+        else:
+            self.application = dispatch_application()
+            try:
+                self.project = open_read_only(self.application, self.name)
+            except Exception:
+                # DispatchEx started this MS Project process, do not leave it running
+                self.application.Quit(pjDoNotSave)
+                self.application = None
+                raise
+        self.logger.debug("Inside ComTaskSource.open > created msp application object and project Object")
+        return self
+
+    def close(self, broken=False):
+        """Closes the MS Project file without saving it, then quits the MS Project Application
+        (or gives it back to the session pool, which discards it when broken, e.g. after a COM error)"""
+        self.logger.debug("Entered: ComTaskSource.close")
+        if self.application is None:
+            return
+        if self.session_pool is not None:
+            self.session_pool.close_project(self.application, broken)
+        else:
+            try:
+                close_without_saving(self.application)
+            finally:
+                self.application.Quit(pjDoNotSave)
+        self.application = None
+        self.project = None
+        self.logger.debug("Inside ComTaskSource.close > closed application")
+        return
+
+    @property
+    def tasks(self):
+        return self.project.Tasks
+
+    def field_constant(self, field_name):
+        return self.application.FieldNameToFieldConstant(field_name)
+
+    @staticmethod
+    def predecessor_unique_ids(t, com_calls=None):
+        """returns the Unique IDs of the predecessors of task t from its "Unique ID Predecessors" field
+        (e.g. "12,15FS+2 days"), one call instead of walking TaskDependencies link by link.
+
+        The links are separated by the list separator of the locale, ";" where the decimal separator is ","
+        (e.g. "12FS+0,5 days;15").  Without a ";" a lag written with a decimal comma ("12FS+0,5 days") can not
+        be told from two links, those tasks are read by walking TaskDependencies."""
+        if com_calls is not None:
+            com_calls["UniqueIDPredecessors"] += 1
+        links = t.UniqueIDPredecessors
+        if ";" in links:
+            links = links.split(";")
+        elif ComTaskSource.decimal_comma_lag.search(links):
+            return TaskSource.predecessor_unique_ids(t, com_calls)
+        else:
+            links = links.split(",")
+        unique_ids = []
+        for link in links:
+            match = ComTaskSource.predecessor_link.match(link)
+            if match is not None:
+                unique_ids.append(int(match.group(1)))
+        return unique_ids
+
+
+class _TaskReference(object):
+    """The "From" end of an MSPDI predecessor link, behaves like the win32com Task it stands in for"""
+
+    def __init__(self, unique_id, names):
+        self.UniqueID = unique_id
+        self.__names = names
+
+    @property
+    def Name(self):
+        return self.__names.get(self.UniqueID, "")
+
+    def __int__(self):
+        return self.UniqueID
+
+    def __str__(self):
+        return str(self.UniqueID)
+
+
+class _TaskDependency(object):
+    def __init__(self, from_task):
+        self.From = from_task
+
+
+class _Assignment(object):
+    def __init__(self, resource_name):
+        self.ResourceName = resource_name
+
+
+class _MspdiTask(object):
+    """A task read from a MSPDI file, exposes the same interface as a win32com Task"""
+
+    def __init__(self, unique_id, fields, predecessor_uids, source):
+        self.UniqueID = unique_id
+        self.__fields = fields
+        self.__predecessor_uids = predecessor_uids
+        self.__source = source
+
+    @property
+    def Name(self):
+        return self.__fields.get("Name", "")
+
+    @property
+    def Summary(self):
+        return self.__fields.get("Summary") == "1"
+
+    @property
+    def OutlineLevel(self):
+        return int(self.__fields.get("OutlineLevel", 1))
+
+    @property
+    def Start(self):
+        return MspdiTaskSource.parse_date(self.__fields.get("Start"))
+
+    @property
+    def Finish(self):
+        return MspdiTaskSource.parse_date(self.__fields.get("Finish"))
+
+    @property
+    def PercentComplete(self):
+        return int(self.__fields.get("PercentComplete") or 0)
+
+    @property
+    def TaskDependencies(self):
+        return [_TaskDependency(_TaskReference(uid, self.__source.task_names)) for uid in self.__predecessor_uids]
+
+    @property
+    def Assignments(self):
+        return [_Assignment(name) for name in self.__source.resource_names_of_task(self.UniqueID)]
+
+    def GetField(self, field_constant):
+        return self.__source.format_value(field_constant, self.__fields.get(field_constant, ""))
+
+
+class MspdiTaskSource(TaskSource):
+    """Tasks read from a Project XML (MSPDI) file, e.g. saved from MS Project with "Save As > XML Format"
+
+    The file is read with a streaming parser: each Task, Resource and Assignment element is reduced to a
+    small record of its simple fields as soon as it has been parsed and is then dropped from the tree,
+    so memory is bounded by the size of the records rather than the size of the XML document.
+    """
+    namespace = "{http://schemas.microsoft.com/project}"
+    typed_fields = {"Start": "Start", "Finish": "Finish", "% Complete": "PercentComplete"}
+
+    # MS Project field names and the MSPDI Task element holding them
+    fields = {"Name": "Name", "Unique ID": "UID", "ID": "ID", "Start": "Start", "Finish": "Finish",
+              "% Complete": "PercentComplete", "% Work Complete": "PercentWorkComplete", "Notes": "Notes",
+              "Duration": "Duration", "Work": "Work", "WBS": "WBS", "Outline Level": "OutlineLevel",
+              "Outline Number": "OutlineNumber", "Milestone": "Milestone", "Critical": "Critical",
+              "Priority": "Priority", "Actual Start": "ActualStart", "Actual Finish": "ActualFinish",
+              "Deadline": "Deadline", "Constraint Date": "ConstraintDate", "Early Start": "EarlyStart",
+              "Early Finish": "EarlyFinish", "Late Start": "LateStart", "Late Finish": "LateFinish",
+              "Hyperlink": "Hyperlink", "Hyperlink Address": "HyperlinkAddress"}
+    date_fields = ("Start", "Finish", "ActualStart", "ActualFinish", "Deadline", "ConstraintDate",
+                   "EarlyStart", "EarlyFinish", "LateStart", "LateFinish")
+    percent_fields = ("PercentComplete", "PercentWorkComplete")
+    duration_fields = ("Duration",)
+    work_fields = ("Work",)
+    flag_fields = ("Milestone", "Critical")
+    # a MSPDI duration, e.g. "PT112H0M0S"
+    duration_pattern = re.compile(r"(-?)P(?:(\d+(?:\.\d+)?)D)?(?:T(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?)?$")
+
+    # MSPDI marks a task assignment without a resource with this resource UID
+    unassigned_resource_uid = "-65535"
+
+    def __init__(self, xml_file, logger=None):
+        super().__init__(xml_file, logger)
+        self.task_names = {}
+        # working minutes in a day of the project (Project/MinutesPerDay), durations are shown in days of these
+        self.minutes_per_day = 480
+        self.__tasks = []
+        self.__resource_names = {}
+        self.__task_resource_uids = {}
+
+    def open(self):
+        """parses the MSPDI file"""
+        self.logger.info("path to MSPDI file entered is %s", self.name)
+        task_tag = self.namespace + "Task"
+        resource_tag = self.namespace + "Resource"
+        assignment_tag = self.namespace + "Assignment"
+        link_tag = self.namespace + "PredecessorLink"
+        path = []  # elements from the root to the element being parsed
+        for event, elem in ET.iterparse(self.name, events=("start", "end")):
+            if event == "start":
+                path.append(elem)
+                continue
+            path.pop()
+            if len(path) == 1 and elem.tag == self.namespace + "MinutesPerDay" and elem.text:
+                self.minutes_per_day = int(elem.text)
+            if len(path) != 2:  # only the children of Project/Tasks, Project/Resources, Project/Assignments
+                continue
+            if elem.tag == task_tag:
+                self.__read_task(elem, link_tag)
+            elif elem.tag == resource_tag:
+                self.__resource_names[elem.findtext(self.namespace + "UID")] = elem.findtext(self.namespace + "Name", "")
+            elif elem.tag == assignment_tag:
+                resource_uid = elem.findtext(self.namespace + "ResourceUID")
+                if resource_uid != self.unassigned_resource_uid:
+                    task_uid = int(elem.findtext(self.namespace + "TaskUID"))
+                    self.__task_resource_uids.setdefault(task_uid, []).append(resource_uid)
+            else:
+                continue
+            # done with the element, drop it so the tree does not grow
+            path[-1].remove(elem)
+        self.logger.info("Read %s tasks from MSPDI file", len(self.__tasks))
+        return self
+
+    def __read_task(self, elem, link_tag):
+        fields = {}
+        predecessor_uids = []
+        for child in elem:
+            if child.tag == link_tag:
+                predecessor_uids.append(int(child.findtext(self.namespace + "PredecessorUID")))
+            elif len(child) == 0:
+                fields[child.tag[len(self.namespace):]] = child.text or ""
+        # the project summary task (outline level 0) and blank lines are not part of the Tasks collection
+        if fields.get("IsNull") == "1" or fields.get("OutlineLevel", "0") == "0":
+            return
+        unique_id = int(fields["UID"])
+        self.task_names[unique_id] = fields.get("Name", "")
+        self.__tasks.append(_MspdiTask(unique_id, fields, predecessor_uids, self))
+
+    def resource_names_of_task(self, unique_id):
+        """returns the names of the resources assigned to the task"""
+        return [self.__resource_names.get(uid, "") for uid in self.__task_resource_uids.get(unique_id, [])]
+
+    def close(self, broken=False):
+        self.__tasks = []
+        return
+
+    @property
+    def tasks(self):
+        return self.__tasks
+
+    def field_constant(self, field_name):
+        try:
+            return self.fields[field_name]
+        except KeyError:
+            raise ValueError("%s is not a MS Project field available from MSPDI files" % field_name)
+
+    @staticmethod
+    def parse_date(text):
+        """returns the datetime of a MSPDI date ("2018-03-12T08:00:00"), None if there is none"""
+        if not text:
+            return None
+        return dt.datetime.strptime(text, "%Y-%m-%dT%H:%M:%S")
+
+    @classmethod
+    def parse_duration(cls, text):
+        """returns the minutes of a MSPDI duration ("PT112H0M0S"), None if it is not one"""
+        match = cls.duration_pattern.match(text)
+        if match is None:
+            return None
+        sign, days, hours, minutes, seconds = match.groups()
+        total = (float(days or 0) * 24 * 60 + float(hours or 0) * 60 + float(minutes or 0)
+                 + float(seconds or 0) / 60)
+        return -total if sign else total
+
+    @staticmethod
+    def format_quantity(quantity, unit):
+        """returns quantity with its unit as MS Project shows it, e.g. "14 days", "1 day", "0.5 days" """
+        quantity = round(quantity, 2)
+        return "%g %s" % (quantity, unit if quantity == 1 else unit + "s")
+
+    def format_value(self, element_name, text):
+        """formats a MSPDI value as MS Project shows it, e.g. dates as "dd/mm/yyyy HH:MM", percentages as "50%",
+        durations in days of the project ("14 days"), work in hours ("112 hrs") and flags as "Yes" / "No" """
+        if not text:
+            return text
+        if element_name in self.date_fields:
+            return self.parse_date(text).strftime("%d/%m/%Y %H:%M")
+        if element_name in self.percent_fields:
+            return text + "%"
+        if element_name in self.duration_fields or element_name in self.work_fields:
+            minutes = self.parse_duration(text)
+            if minutes is None:
+                return text
+            if element_name in self.duration_fields:
+                return self.format_quantity(minutes / self.minutes_per_day, "day")
+            return self.format_quantity(minutes / 60, "hr")
+        if element_name in self.flag_fields:
+            return "Yes" if text == "1" else "No"
+        return text
+
+
+def task_source_for_file(project_file, logger=None, session_pool=None):
+    """returns the task source able to read project_file, Project XML files (.xml) are read without MS Project
+
+    Arguments:
+        project_file {str} -- full path to a .mpp or .xml project file
+
+    Keyword Arguments:
+        session_pool {MSProjectSessionPool} -- MS Project sessions to open .mpp files in (default: {None}, starts MS Project)
+
+    Returns:
+        [TaskSource] -- unopened task source for the file
+    """
+    if pathlib.Path(project_file).suffix.lower() == ".xml":
+        return MspdiTaskSource(project_file, logger)
+    return ComTaskSource(project_file, logger, session_pool)
@@ -0,0 +1,207 @@
+"""Command line runner writing many reports from a JSON job file, each project being extracted once.
+
+    python reportRunner.py job.json [--max-workers 4] [--metrics metrics.json] [--lease-timeout 600]
+
+A job file lists the projects and the reports of each project, paths being relative to the job file:
+
+    {
+        "logging_level": "INFO",
+        "cache_dir": "cache",
+        "projects": [
+            {
+                "file": "MyBlogProject.mpp",
+                "headers": ["Notes"],
+                "UniqueIDs_to_Ignore": [12, 15],
+                "prune_ignored_subtrees": true,
+                "lazy_columns": false,
+                "reports": [
+                    {"type": "WIP", "output": "out/WIP.xlsx", "due_date": "01/06/2018",
+                     "duration_of_periods": 7, "num_of_periods": 5,
+                     "header_to_filter": "Resource Names", "filter_text": "Bob",
+                     "flag_incomplete_only": true, "flag_OUTPUT_WIP_COLUMN": true,
+                     "format": {"date_cols": ["D:E"], "autofit_cols": ["C"], "wrap_text_cols_ColWidth_medium": ["H"]}},
+                    {"type": "FINISHING", "output": "out/FINISHING.xlsx", "headers": ["Notes"]},
+                    {"type": "RESOURCE_LOADING", "output": "out/Loading.xlsx", "weight_by_remaining": true}
+                ]
+            }
+        ]
+    }
+
+Report "type" is WIP, FINISHING (output_dictionary_of_data_frames_WIP / _FINISHING, taking the same arguments)
+or RESOURCE_LOADING (resource_loading, one sheet).  With "lazy_columns" the WIP and FINISHING sheets hold the
+core columns, plus the deferred "headers" listed in the report.  "format" sets the excelReportWriter column formatting
+(date_cols, date_format, autofit_cols, wrap_text_cols_ColWidth_small/medium/large, colWidths).
+"cache_dir" (optional) keeps the extracted projects in a ProjectSnapshotCache.
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import logging
+import pathlib
+import sys
+import time
+
+from ProjectToExcelClasses import DataFrameOfMSProject
+from msProjectSessionPool import MSProjectSessionPool
+from projectCache import ProjectSnapshotCache
+from writeExcel import excelReportWriter
+
+report_types = ("WIP", "FINISHING", "RESOURCE_LOADING")
+# report settings passed on to the DataFrameOfMSProject report methods
+report_arguments = {
+    "WIP": ("due_date", "header_to_filter", "filter_text", "duration_of_periods", "num_of_periods",
+            "flag_incomplete_only", "flag_OUTPUT_WIP_COLUMN", "headers"),
+    "FINISHING": ("due_date", "header_to_filter", "filter_text", "duration_of_periods", "num_of_periods",
+                  "flag_incomplete_only", "headers"),
+    "RESOURCE_LOADING": ("due_date", "header_to_filter", "filter_text", "duration_of_periods", "num_of_periods",
+                         "flag_incomplete_only", "weight_by_remaining"),
+}
+project_settings = ("file", "headers", "UniqueIDs_to_Ignore", "prune_ignored_subtrees", "lazy_columns", "reports")
+format_settings = ("date_cols", "date_format", "autofit_cols", "wrap_text_cols_ColWidth_small",
+                   "wrap_text_cols_ColWidth_medium", "wrap_text_cols_ColWidth_large", "colWidths")
+
+
+def load_job(job_file):
+    """returns the job of a job file, with its paths resolved against the job file directory
+
+    Raises:
+        ValueError -- the job file is not valid
+    """
+    job_file = pathlib.Path(job_file)
+    with open(job_file) as f:
+        job = json.load(f)
+    base = job_file.resolve().parent
+    if not job.get("projects"):
+        raise ValueError("%s lists no projects" % job_file)
+    for project in job["projects"]:
+        if "file" not in project:
+            raise ValueError("a project of %s has no file" % job_file)
+        unknown = set(project) - set(project_settings)
+        if unknown:
+            raise ValueError("unknown settings %s in project %s" % (sorted(unknown), project["file"]))
+        project["file"] = str(base / project["file"])
+        for report in project.get("reports", []):
+            if report.get("type") not in report_types:
+                raise ValueError("report type %r of %s is not one of %s" % (report.get("type"), project["file"],
+                                                                           ", ".join(report_types)))
+            if "output" not in report:
+                raise ValueError("a %s report of %s has no output" % (report["type"], project["file"]))
+            report["output"] = str(base / report["output"])
+            unknown = set(report) - set(report_arguments[report["type"]]) - {"type", "output", "format"}
+            unknown |= set(report.get("format", {})) - set(format_settings)
+            if unknown:
+                raise ValueError("unknown settings %s in a %s report of %s" % (sorted(unknown), report["type"],
+                                                                              project["file"]))
+    if "cache_dir" in job:
+        job["cache_dir"] = str(base / job["cache_dir"])
+    return job
+
+
+def build_report(project, report):
+    """returns the dictionary of DataFrames (one per sheet) of a report of project (a DataFrameOfMSProject)"""
+    arguments = {name: report[name] for name in report_arguments[report["type"]] if name in report}
+    if report["type"] == "WIP":
+        return project.output_dictionary_of_data_frames_WIP(**arguments)
+    if report["type"] == "FINISHING":
+        return project.output_dictionary_of_data_frames_FINISHING(**arguments)
+    return collections.OrderedDict([("Loading", project.resource_loading(**arguments))])
+
+
+def write_report(report, dictionary_of_data_frames):
+    """writes a report with its own excelReportWriter, returns the writer metrics"""
+    writer = excelReportWriter()
+    for name, value in report.get("format", {}).items():
+        setattr(writer, name, value)
+    pathlib.Path(report["output"]).parent.mkdir(parents=True, exist_ok=True)
+    writer.writeExcel(report["output"], dictionary_of_data_frames)
+    return writer.metrics.as_dict()
+
+
+def run_job(job, max_workers=4, logger=None, lease_timeout=600):
+    """extracts each project of job once and writes all its reports, the workbooks being written by
+    max_workers threads while the next reports are built.  A project waiting more than lease_timeout
+    seconds for the MS Project session fails rather than hanging the job.
+
+    Returns:
+        [dict] -- {"projects": [project metrics], "reports": [report metrics], "errors": {output: error}, "seconds": s}
+    """
+    if logger is None:
+        logger = logging.getLogger('Log')
+    started = time.perf_counter()
+    cache = ProjectSnapshotCache(job["cache_dir"]) if "cache_dir" in job else None
+    results = {"projects": [], "reports": [], "errors": {}}
+    with MSProjectSessionPool(size=1, lease_timeout=lease_timeout) as session_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for project_job in job["projects"]:
+            try:
+                project = DataFrameOfMSProject(headers=project_job.get("headers"), ms_project_file=project_job["file"],
+                                               logging_level=job.get("logging_level", "INFO"),
+                                               UniqueIDs_to_Ignore=project_job.get("UniqueIDs_to_Ignore", []),
+                                               prune_ignored_subtrees=project_job.get("prune_ignored_subtrees", False),
+                                               lazy_columns=project_job.get("lazy_columns", False),
+                                               cache=cache, session_pool=session_pool)
+                error = None if project.project_data_frame is not None else \
+                    "%s could not be extracted" % project_job["file"]
+            except Exception as exception:
+                logger.exception("Failed to extract %s", project_job["file"])
+                error = "%s could not be extracted: %r" % (project_job["file"], exception)
+            if error is not None:
+                for report in project_job.get("reports", []):
+                    results["errors"][report["output"]] = error
+                continue
+            for report in project_job.get("reports", []):
+                try:
+                    dictionary_of_data_frames = build_report(project, report)
+                except Exception as error:
+                    logger.exception("Failed to build %s", report["output"])
+                    results["errors"][report["output"]] = repr(error)
+                    continue
+                futures[executor.submit(write_report, report, dictionary_of_data_frames)] = report
+            results["projects"].append({"file": project_job["file"], "tasks": len(project.project_data_frame),
+                                        "metrics": project.metrics})
+
+        for future in concurrent.futures.as_completed(futures):
+            report = futures[future]
+            try:
+                results["reports"].append({"output": report["output"], "type": report["type"],
+                                           "metrics": future.result()})
+                logger.info("Wrote %s", report["output"])
+            except Exception as error:
+                logger.exception("Failed to write %s", report["output"])
+                results["errors"][report["output"]] = repr(error)
+        results["session_pool"] = session_pool.stats
+    if cache is not None:
+        results["cache"] = cache.stats
+    results["seconds"] = time.perf_counter() - started
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Writes the reports of a JSON job file, extracting each project once")
+    parser.add_argument("job_file", help="JSON job file listing the projects and their reports")
+    parser.add_argument("--max-workers", type=int, default=4, help="number of reports written at once (default: 4)")
+    parser.add_argument("--metrics", help="file to write the run metrics to as JSON")
+    parser.add_argument("--lease-timeout", type=float, default=600,
+                        help="seconds a project waits for the MS Project session (default: 600)")
+    arguments = parser.parse_args(argv)
+
+    try:
+        job = load_job(arguments.job_file)
+    except (OSError, ValueError) as error:
+        print("Job file error: %s" % error, file=sys.stderr)
+        return 2
+    results = run_job(job, arguments.max_workers, lease_timeout=arguments.lease_timeout)
+    for report in results["reports"]:
+        print("wrote %s" % report["output"])
+    for output, error in results["errors"].items():
+        print("FAILED %s: %s" % (output, error), file=sys.stderr)
+    if arguments.metrics:
+        with open(arguments.metrics, "w") as f:
+            json.dump(results, f, indent=1, default=str)
+    return 1 if results["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Instrumentation of the report runs: set up of the shared 'Log' logger and per phase timers and counters.
+
+    metrics = RunMetrics()
+    with metrics.phase("open"):
+        source.open()
+    metrics.count("tasks", len(tasks))
+    metrics.as_dict()  # {"seconds": {"open": 0.8}, "counts": {"tasks": 1200}}
+"""
+import atexit
+import collections
+import contextlib
+import datetime as dt
+import logging
+import logging.handlers
+import os
+import pathlib
+import queue
+import time
+
+log_format = '%(asctime)s - %(name)-4s - %(levelname)-8s - function: %(funcName)-15s LineNum: %(lineno)-5d - %(message)s'
+
+# the listener writing the queued records of the 'Log' logger to the log file, one per process
+_listener = None
+# the process the listener runs in, its QueueHandler on the 'Log' logger and the log file it was set up with
+_listener_pid = None
+_queue_handler = None
+_log_file = None
+
+
+def _start_listener(log_name, log_dir):
+    """attaches a QueueHandler to the 'Log' logger and starts the listener writing its records to a new log file"""
+    global _listener, _listener_pid, _queue_handler, _log_file
+    pathlib.Path(log_dir).mkdir(parents=True, exist_ok=True)
+    now = dt.datetime.now().strftime("%Y-%m-%d %H-%M-%S")
+    if _listener_pid is not None:  # a forked process, do not write to the log file of its parent
+        log_name = "%s-%s" % (log_name, os.getpid())
+    handler = logging.handlers.RotatingFileHandler(str(pathlib.Path(log_dir, now + log_name)) + ".log",
+                                                   maxBytes=1000000, backupCount=5)
+    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(logging.Formatter(log_format, datefmt='%m-%d-%Y %H:%M'))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _log_file = (log_name, log_dir)
+    logging.getLogger('Log').addHandler(_queue_handler)
+    # flush the records still queued when the process ends
+    atexit.register(_listener.stop)
+
+
+def _restart_listener_after_fork():
+    """a forked process inherits the QueueHandler but not the listener thread emptying its queue,
+    replace them with its own"""
+    if _listener is None or _listener_pid == os.getpid():
+        return
+    atexit.unregister(_listener.stop)
+    logging.getLogger('Log').removeHandler(_queue_handler)
+    _start_listener(*_log_file)
+
+
+if hasattr(os, "register_at_fork"):  # not on Windows, where worker processes are spawned rather than forked
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+
+def set_up_logger(logging_level="INFO", log_name="Log", log_dir="log"):
+    """returns the shared 'Log' logger set to logging_level.
+
+    The first call in a process attaches a QueueHandler to the logger and starts a QueueListener
+    writing the records to a rotating log file "log_dir/<date time><log_name>.log" on its own thread,
+    so logging does not wait on the disk.  Later calls only set the level, so the handlers do not pile up
+    however many DataFrameOfMSProject or excelFormatColumns objects are created.  A process forked from it
+    (e.g. a DataFrameOfPortfolio worker) gets its own listener and log file, "<date time><log_name>-<pid>.log".
+
+    Keyword Arguments:
+        logging_level {str} -- Options: "DEBUG" or "INFO", None leaves the level unchanged (default: {"INFO"})
+        log_name {str} -- name of the log file, after the date and time (default: {"Log"})
+        log_dir {str} -- directory of the log files (default: {"log"})
+    """
+    logger = logging.getLogger('Log')
+    if logging_level == "DEBUG":
+        logger.setLevel(logging.DEBUG)
+    elif logging_level == "INFO":
+        logger.setLevel(logging.INFO)
+    if _listener is None:
+        _start_listener(log_name, log_dir)
+    return logger
+
+
+def flush_logger():
+    """writes the records queued so far to the log file, for processes ending without running atexit
+    (os._exit, e.g. the worker processes of a process pool)"""
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener.start()
+
+
+class RunMetrics(object):
+    """Time spent in each phase of a run (open, task iteration, field fetch, bucketing, excel write...)
+    and counters (tasks, rows, sheets...), accumulated over the run"""
+
+    def __init__(self):
+        self.seconds = collections.defaultdict(float)
+        self.counts = collections.Counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """times the body of a with statement as phase name"""
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+    def add_time(self, name, seconds):
+        """adds seconds to phase name, for phases timed in a loop"""
+        self.seconds[name] += seconds
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def update(self, other):
+        """adds the times and counts of other (a RunMetrics)"""
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+        self.counts.update(other.counts)
+        return self
+
+    def as_dict(self):
+        """returns {"seconds": {phase: seconds}, "counts": {counter: count}}"""
+        return {"seconds": dict(self.seconds), "counts": dict(self.counts)}
@@ -0,0 +1,271 @@
+"""Monte Carlo schedule risk: how likely the tasks are to finish when planned, given uncertain durations.
+
+    risk = ScheduleRisk(project, iterations=1000, duration_spread=(0.9, 1.0, 1.5))
+    risk.task_forecast()                              # P50 / P80 Finish of every task
+    risk.summary_forecast()                           # P50 / P80 Finish of every summary task (path)
+    risk.finishing_probabilities("01/06/2018")        # probability of each task finishing in each FINISHING period
+    excelReportWriter().writeExcel(xlPath, risk.output_dictionary_of_data_frames("01/06/2018"))
+
+The remaining duration of each task is multiplied by a factor drawn from a triangular distribution, for all
+the iterations at once (an iterations x tasks array).  A task that has not started starts at its planned
+Start or when its last predecessor finishes, whichever is later, so the finish dates are propagated through
+the predecessor links one topological level (see DependencyGraph.topological_levels) at a time, every task
+of a level and every iteration in one numpy operation.  Durations are calendar days (Finish - Start).
+"""
+import collections
+import datetime as dt
+import logging
+
+import numpy as np
+import pandas as pd
+
+from dependencyGraph import DependencyGraph
+from outlineTree import OutlineTree
+from periodBucketing import PeriodBuckets
+
+_day_ns = 86400 * 10 ** 9
+
+
+class ScheduleRisk(object):
+    """Monte Carlo simulation of the finish dates of the tasks of a project dataframe"""
+
+    def __init__(self, project, dependency_graph=None, iterations=1000, duration_spread=(0.9, 1.0, 1.5), seed=0,
+                 chunk_size=250, logger=None):
+        """
+        Arguments:
+            project {DataFrameOfMSProject or DataFrame} -- the project, or its project_data_frame (with Start,
+                                                           Finish and % Complete, indexed by UniqueID)
+
+        Keyword Arguments:
+            dependency_graph {DependencyGraph} -- the predecessor links (default: {None}, the project's dependency_graph,
+                                                  or the graph of the Predecessors column of a DataFrame)
+            iterations {int} -- number of simulated schedules (default: {1000}), the finish dates of all the
+                                iterations are kept: iterations x tasks x 4 bytes
+            duration_spread {tuple} -- (optimistic, most likely, pessimistic) factors of the remaining duration
+                                       of a task (default: {(0.9, 1.0, 1.5)})
+            seed {int} -- seed of the random numbers (default: {0})
+            chunk_size {int} -- number of iterations simulated at once (default: {250})
+            logger {logging.Logger} -- logger to report to (default: {None}, uses the 'Log' logger)
+        """
+        self.logger = logger if logger is not None else logging.getLogger('Log')
+        if dependency_graph is None and hasattr(project, "dependency_graph"):
+            dependency_graph = project.dependency_graph  # before project_data_frame, fetches deferred Predecessors
+        frame = getattr(project, "project_data_frame", project)
+        missing = [h for h in ("Start", "Finish", "% Complete") if h not in frame.columns]
+        if missing:
+            raise ValueError("the project DataFrame has no %s column" % ", ".join(missing))
+        if dependency_graph is None:
+            dependency_graph = DependencyGraph.from_frame(frame)
+        self.project_data_frame = frame
+        self.dependency_graph = dependency_graph
+        self.iterations = iterations
+        self.duration_spread = duration_spread
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.__finish_samples = None
+        self.__groups = None
+
+        start = frame["Start"].to_numpy(dtype="datetime64[ns]")
+        finish = frame["Finish"].to_numpy(dtype="datetime64[ns]")
+        # the dates are held as days after the origin
+        self.origin = start[~np.isnat(start)].min() if (~np.isnat(start)).any() else np.datetime64(0, "ns")
+        self.__start = (start - self.origin) / np.timedelta64(1, "D")
+        duration = (finish - start) / np.timedelta64(1, "D")
+        percent_complete = frame["% Complete"].to_numpy(dtype=float)
+        self.__started = percent_complete > 0
+        self.__done = duration * percent_complete / 100
+        self.__remaining = duration - self.__done
+        self.__links = self.__level_links()
+
+    def __level_links(self):
+        """returns the links between the tasks of the frame into tasks not started, grouped by task and ordered
+        by the topological level of the task: (predecessor rows, segment starts, task rows, level starts)"""
+        predecessors, tasks = self.dependency_graph.links()
+        index = self.project_data_frame.index
+        predecessor_rows = index.get_indexer(predecessors)
+        task_rows = index.get_indexer(tasks)
+        levels = self.dependency_graph.topological_levels()  # in the graph's unique_ids order
+        graph_positions = pd.Index(self.dependency_graph.unique_ids).get_indexer(tasks)
+        # links to or from tasks left out of the frame (ignored tasks, summary tasks) are dropped,
+        # a started task keeps its actual Start
+        kept = (predecessor_rows >= 0) & (task_rows >= 0)
+        kept[kept] &= ~self.__started[task_rows[kept]]
+        if (~kept).any():
+            self.logger.debug("%s links left out of the simulation", int((~kept).sum()))
+        predecessor_rows, task_rows, levels = predecessor_rows[kept], task_rows[kept], levels[graph_positions[kept]]
+        order = np.lexsort((task_rows, levels))
+        predecessor_rows, task_rows, levels = predecessor_rows[order], task_rows[order], levels[order]
+        segment_starts = np.flatnonzero(np.r_[True, task_rows[1:] != task_rows[:-1]]) if len(task_rows) else \
+            np.zeros(0, dtype=np.int64)
+        segment_levels = levels[segment_starts]
+        level_starts = np.flatnonzero(np.r_[True, segment_levels[1:] != segment_levels[:-1]]) if len(segment_starts) \
+            else np.zeros(0, dtype=np.int64)
+        self.logger.info("Schedule risk network: %s tasks, %s links, %s levels", len(self.project_data_frame),
+                         len(task_rows), len(level_starts))
+        return predecessor_rows, segment_starts, task_rows[segment_starts], level_starts
+
+    def __factors(self, rng, size):
+        optimistic, most_likely, pessimistic = self.duration_spread
+        if optimistic == pessimistic:
+            return np.full(size, float(most_likely))
+        return rng.triangular(optimistic, most_likely, pessimistic, size)
+
+    def simulate(self):
+        """runs the simulation (once) and returns the finish samples, an (iterations, tasks) array of days after origin"""
+        if self.__finish_samples is not None:
+            return self.__finish_samples
+        rng = np.random.default_rng(self.seed)
+        num_of_tasks = len(self.project_data_frame)
+        predecessor_rows, segment_starts, targets, level_starts = self.__links
+        segment_ends = np.r_[segment_starts[1:], len(predecessor_rows)]
+        level_ends = np.r_[level_starts[1:], len(targets)]
+        samples = np.empty((self.iterations, num_of_tasks), dtype=np.float32)
+        for first in range(0, self.iterations, self.chunk_size):
+            size = min(self.chunk_size, self.iterations - first)
+            duration = self.__done + self.__remaining * self.__factors(rng, (size, num_of_tasks))
+            finish = self.__start + duration  # tasks without predecessors in the network
+            for level_start, level_end in zip(level_starts, level_ends):
+                # the tasks of a level only follow tasks of the lower levels, already finished
+                first_link, last_link = segment_starts[level_start], segment_ends[level_end - 1]
+                latest = np.fmax.reduceat(finish[:, predecessor_rows[first_link:last_link]],
+                                          segment_starts[level_start:level_end] - first_link, axis=1)
+                tasks = targets[level_start:level_end]
+                finish[:, tasks] = np.fmax(self.__start[tasks], latest) + duration[:, tasks]
+            samples[first:first + size] = finish
+        self.__finish_samples = samples
+        self.logger.info("Simulated %s iterations of %s tasks", self.iterations, num_of_tasks)
+        return samples
+
+    def _to_dates(self, days, to_the_minute=True):
+        """returns the dates (datetime64[ns] array) of an array of days after origin"""
+        missing = np.isnan(days)
+        nanoseconds = np.where(missing, 0, np.asarray(days, dtype=np.float64) * _day_ns).astype(np.int64)
+        dates = np.where(missing, np.datetime64("NaT"), self.origin + nanoseconds.astype("timedelta64[ns]"))
+        if to_the_minute:
+            dates = pd.DatetimeIndex(dates.ravel()).round("min").to_numpy().reshape(np.shape(days))
+        return dates
+
+    @staticmethod
+    def _percentiles(samples, percentiles):
+        """returns the percentiles of each column of samples, NaN for the columns without dates"""
+        values = np.full((len(percentiles), samples.shape[1]), np.nan)
+        valid = ~np.isnan(samples[0])  # a task has a finish in every iteration or in none
+        if valid.any():
+            values[:, valid] = np.percentile(samples[:, valid], percentiles, axis=0)
+        return values
+
+    def task_forecast(self, percentiles=(50, 80)):
+        """returns a DataFrame of the planned Finish and the percentile finish dates ("P50 Finish"...) of every task"""
+        values = self._percentiles(self.simulate(), percentiles)
+        forecast = pd.DataFrame(index=self.project_data_frame.index)
+        for header in ("SummaryTask", "Name", "Finish"):
+            if header in self.project_data_frame.columns:
+                forecast[header] = self.project_data_frame[header]
+        for percentile, days in zip(percentiles, values):
+            forecast["P%s Finish" % percentile] = self._to_dates(days)
+        return forecast
+
+    def __summary_groups(self):
+        """returns (summary paths, task order, path starts, path of each pair, summary starts): the tasks ordered
+        by their SummaryTask path (path starts being where each path starts in the task order), then the
+        (path, summary task above it) pairs ordered by summary task, at any depth, "" standing for the project"""
+        if self.__groups is None:
+            summary_tasks = self.project_data_frame["SummaryTask"]
+            if isinstance(summary_tasks.dtype, pd.CategoricalDtype):
+                codes, paths = summary_tasks.cat.codes.to_numpy(), list(summary_tasks.cat.categories)
+            else:
+                codes, paths = pd.factorize(summary_tasks)
+                paths = list(paths)
+            codes = np.where(codes < 0, len(paths), codes)  # no SummaryTask, only below the project
+            paths.append("")
+            task_order = np.argsort(codes, kind="stable")
+            path_starts = np.flatnonzero(np.r_[True, codes[task_order][1:] != codes[task_order][:-1]])
+            # the summary tasks above each path used, the project ("") included
+            prefixes = {"": 0}
+            pair_paths, pair_summaries = [], []
+            for number, code in enumerate(codes[task_order][path_starts]):
+                path = paths[code]
+                names = path.split(OutlineTree.separator) if isinstance(path, str) and path else []
+                pair_paths.append(number)
+                pair_summaries.append(0)
+                for depth in range(1, len(names) + 1):
+                    pair_paths.append(number)
+                    pair_summaries.append(prefixes.setdefault(OutlineTree.separator.join(names[:depth]), len(prefixes)))
+            pair_paths, pair_summaries = np.array(pair_paths), np.array(pair_summaries)
+            order = np.argsort(pair_summaries, kind="stable")
+            pair_paths, pair_summaries = pair_paths[order], pair_summaries[order]
+            summary_starts = np.flatnonzero(np.r_[True, pair_summaries[1:] != pair_summaries[:-1]])
+            names = list(np.array(list(prefixes), dtype=object)[pair_summaries[summary_starts]])
+            self.__groups = names, task_order, path_starts, pair_paths, summary_starts
+        return self.__groups
+
+    def __summary_reduce(self, ufunc, values):
+        """returns (summary paths, ufunc (np.fmax, np.add) reduced over the tasks below each summary task) of values,
+        a tasks array or an (iterations, tasks) array"""
+        names, task_order, path_starts, pair_paths, summary_starts = self.__summary_groups()
+        by_path = ufunc.reduceat(values[..., task_order], path_starts, axis=-1)
+        return names, ufunc.reduceat(by_path[..., pair_paths], summary_starts, axis=-1)
+
+    def summary_samples(self):
+        """returns (summary paths, an (iterations, paths) array of the finish of each summary task in each iteration),
+        the finish of a summary task being the latest finish of the tasks below it at any depth, "" standing for
+        the whole project"""
+        samples = self.simulate()
+        names = self.__summary_groups()[0]
+        summary_finish = np.empty((samples.shape[0], len(names)), dtype=np.float32)
+        for first in range(0, samples.shape[0], self.chunk_size):
+            chunk = samples[first:first + self.chunk_size]
+            summary_finish[first:first + len(chunk)] = self.__summary_reduce(np.fmax, chunk)[1]
+        return names, summary_finish
+
+    def summary_forecast(self, percentiles=(50, 80)):
+        """returns a DataFrame, indexed by summary task path ("" for the whole project), of the number of tasks
+        below each summary task, its planned Finish (latest Finish of its tasks) and percentile finish dates"""
+        names, samples = self.summary_samples()
+        forecast = pd.DataFrame(index=pd.Index(names, name="SummaryTask"))
+        forecast["Tasks"] = self.__summary_reduce(np.add, np.ones(len(self.project_data_frame), dtype=np.int64))[1]
+        forecast["Finish"] = self._to_dates(self.__summary_reduce(np.fmax, self.__start + self.__done
+                                                                  + self.__remaining)[1])
+        for percentile, days in zip(percentiles, self._percentiles(samples, percentiles)):
+            forecast["P%s Finish" % percentile] = self._to_dates(days)
+        return forecast
+
+    def finishing_probabilities(self, due_date=None, duration_of_periods=7, num_of_periods=5):
+        """returns a DataFrame of the probability of every task finishing on or before the due date ("Overdue") and
+        in each period of output_dictionary_of_data_frames_FINISHING called with the same arguments
+
+        Keyword Arguments:
+            due_date {str} -- "dd/mm/yyyy" (default: {None}, today)
+            duration_of_periods {int} -- number of days in a period (default: {7})
+            num_of_periods {int} -- number of sheets of the FINISHING report, "Overdue" included (default: {5})
+        """
+        if due_date is None:  # if no date offered, use todays date
+            due_date = dt.datetime.today().date()
+        else:
+            due_date = dt.datetime.strptime(due_date, "%d/%m/%Y").date()
+        buckets = PeriodBuckets(due_date, duration_of_periods, num_of_periods - 1)
+        samples = self.simulate()
+        num_of_tasks = samples.shape[1]
+        due = np.datetime64(pd.Timestamp(due_date), "ns")
+        counts = np.zeros((len(buckets.keys) + 1, num_of_tasks), dtype=np.int64)
+        for first in range(0, samples.shape[0], self.chunk_size):
+            finish = self._to_dates(samples[first:first + self.chunk_size], to_the_minute=False)
+            counts[0] += (finish <= due).sum(axis=0)
+            period = buckets.period_of(finish)
+            tasks = np.broadcast_to(np.arange(num_of_tasks), period.shape)
+            in_period = period >= 0
+            counts[1:] += np.bincount(period[in_period] * num_of_tasks + tasks[in_period],
+                                      minlength=len(buckets.keys) * num_of_tasks).reshape(len(buckets.keys), -1)
+        return pd.DataFrame(counts.T / samples.shape[0], index=self.project_data_frame.index,
+                            columns=["Overdue"] + buckets.keys)
+
+    def output_dictionary_of_data_frames(self, due_date=None, duration_of_periods=7, num_of_periods=5,
+                                         percentiles=(50, 80)):
+        """returns an OrderedDict of the "Tasks" forecast, the "Summary Tasks" forecast and the "Finishing Probabilities"
+        (a sheet each), ready for excelReportWriter.writeExcel"""
+        data_frame_collection = collections.OrderedDict()
+        data_frame_collection["Tasks"] = self.task_forecast(percentiles)
+        data_frame_collection["Summary Tasks"] = self.summary_forecast(percentiles)
+        data_frame_collection["Finishing Probabilities"] = self.finishing_probabilities(due_date, duration_of_periods,
+                                                                                        num_of_periods)
+        return data_frame_collection
@@ -0,0 +1,194 @@
+"""Synthetic schedules, to measure DataFrameOfMSProject without MS Project, Windows or a real .mpp file.
+
+    source = SyntheticTaskSource(num_of_tasks=10000, outline_depth=3, dependency_density=1.5)
+    project = DataFrameOfMSProject(task_source=source)
+
+SyntheticApplication fakes the part of MSProject.Application used by ComTaskSource and MSProjectSessionPool.
+
+The tasks expose the MSProject Task interface read by DataFrameOfMSProject (UniqueID, Summary, OutlineLevel,
+Name, GetField, TaskDependencies, Assignments and the typed Start, Finish and PercentComplete), GetField
+returning text formatted as MS Project does.  The same arguments (and seed) always give the same schedule.
+"""
+import datetime as dt
+import random
+import time
+
+from projectTaskSources import TaskSource, _Assignment, _TaskDependency, _TaskReference
+
+
+class SyntheticTask(object):
+    """A generated task, exposes the same interface as a win32com Task"""
+
+    def __init__(self, unique_id, name, outline_level, summary, start=None, finish=None, percent_complete=0,
+                 predecessor_uids=(), resource_names=(), task_names=None):
+        self.UniqueID = unique_id
+        self.Name = name
+        self.OutlineLevel = outline_level
+        self.Summary = summary
+        self.Start = start
+        self.Finish = finish
+        self.PercentComplete = percent_complete
+        self.__predecessor_uids = predecessor_uids
+        self.__resource_names = resource_names
+        self.__task_names = task_names if task_names is not None else {}
+
+    @property
+    def TaskDependencies(self):
+        return [_TaskDependency(_TaskReference(uid, self.__task_names)) for uid in self.__predecessor_uids]
+
+    @property
+    def Assignments(self):
+        return [_Assignment(name) for name in self.__resource_names]
+
+    @property
+    def UniqueIDPredecessors(self):
+        return ",".join(str(uid) for uid in self.__predecessor_uids)
+
+    def GetField(self, field_constant):
+        if field_constant == "Name":
+            return self.Name
+        if field_constant in ("Start", "Finish"):
+            date = getattr(self, field_constant)
+            return date.strftime("%d/%m/%Y %H:%M") if date is not None else "NA"
+        if field_constant == "% Complete":
+            return "%d%%" % self.PercentComplete
+        if field_constant == "Duration":
+            return "%d days" % (self.Finish - self.Start).days if self.Start is not None else ""
+        if field_constant == "Outline Level":
+            return str(self.OutlineLevel)
+        if field_constant == "Unique ID":
+            return str(self.UniqueID)
+        if field_constant == "Notes":
+            return "" if self.Summary else "Notes of %s" % self.Name
+        return ""
+
+
+def generate_tasks(num_of_tasks=1000, outline_depth=3, tasks_per_summary=10, dependency_density=1.0,
+                   resources_per_task=1, num_of_resources=20, start_date=dt.datetime(2018, 1, 1, 8),
+                   date_spread_days=365, max_duration_days=20, seed=0):
+    """returns a list of SyntheticTask in outline order: num_of_tasks leaf tasks at outline level outline_depth,
+    grouped tasks_per_summary at a time under summary tasks on each of the levels above
+
+    Keyword Arguments:
+        num_of_tasks {int} -- number of leaf (non summary) tasks (default: {1000})
+        outline_depth {int} -- outline level of the leaf tasks, 1 for no summary tasks (default: {3})
+        tasks_per_summary {int} -- number of tasks (or summary tasks) below each summary task (default: {10})
+        dependency_density {float} -- average number of predecessors of a leaf task, each being an earlier leaf task
+                                      so the schedule has no loops (default: {1.0})
+        resources_per_task {int} -- maximum number of resources assigned to a leaf task (default: {1})
+        num_of_resources {int} -- number of resources in the project (default: {20})
+        start_date {datetime} -- first possible start date (default: {2018-01-01 08:00})
+        date_spread_days {int} -- the tasks start within date_spread_days of start_date (default: {365})
+        max_duration_days {int} -- maximum duration of a task (default: {20})
+        seed {int} -- seed of the random numbers (default: {0})
+    """
+    rng = random.Random(seed)
+    resources = ["Resource %d" % number for number in range(1, num_of_resources + 1)]
+    task_names = {}
+    tasks = []
+    leaf_uids = []
+    unique_id = 0
+    for leaf in range(num_of_tasks):
+        # open a summary task on every level whose block of tasks starts with this leaf
+        for level in range(1, outline_depth):
+            if leaf % tasks_per_summary ** (outline_depth - level) == 0:
+                unique_id += 1
+                name = "Summary %d L%d" % (unique_id, level)
+                task_names[unique_id] = name
+                tasks.append(SyntheticTask(unique_id, name, level, True, task_names=task_names))
+        unique_id += 1
+        name = "Task %d" % unique_id
+        task_names[unique_id] = name
+        start = start_date + dt.timedelta(days=rng.randrange(date_spread_days))
+        finish = start + dt.timedelta(days=rng.randrange(max_duration_days + 1), hours=9)
+        num_of_predecessors = int(dependency_density) + (rng.random() < dependency_density % 1)
+        window = leaf_uids[-50:]
+        predecessor_uids = tuple(sorted(rng.sample(window, min(num_of_predecessors, len(window)))))
+        resource_names = tuple(rng.sample(resources, rng.randint(0, min(resources_per_task, len(resources)))))
+        tasks.append(SyntheticTask(unique_id, name, outline_depth, False, start, finish,
+                                   rng.choice((0, 0, 25, 50, 75, 100)), predecessor_uids, resource_names, task_names))
+        leaf_uids.append(unique_id)
+    return tasks
+
+
+class SyntheticTaskSource(TaskSource):
+    """Task source of a generated schedule, takes the keyword arguments of generate_tasks"""
+    typed_fields = {"Start": "Start", "Finish": "Finish", "% Complete": "PercentComplete"}
+    fields = ("Name", "Start", "Finish", "% Complete", "Duration", "Outline Level", "Unique ID", "Notes")
+
+    def __init__(self, logger=None, **options):
+        super().__init__("synthetic project %s" % sorted(options.items()), logger)
+        self.options = options
+        self.__tasks = []
+
+    def open(self):
+        """generates the tasks"""
+        self.__tasks = generate_tasks(**self.options)
+        self.logger.info("Generated %s tasks", len(self.__tasks))
+        return self
+
+    def close(self, broken=False):
+        self.__tasks = []
+        return
+
+    @property
+    def tasks(self):
+        return self.__tasks
+
+    @staticmethod
+    def field_constant(field_name):
+        if field_name not in SyntheticTaskSource.fields:
+            raise ValueError("%s is not a field of the synthetic projects" % field_name)
+        return field_name
+
+
+class _SyntheticProject(object):
+    def __init__(self, name, tasks):
+        self.Name = name
+        self.Tasks = tasks
+
+
+class SyntheticApplication(object):
+    """Fake MSProject.Application opening every file as a synthetic schedule (the file is not read),
+    e.g. MSProjectSessionPool(application_factory=lambda: SyntheticApplication(num_of_tasks=500))
+
+    Keyword Arguments:
+        startup_seconds {float} -- time taken to start, as MS Project takes seconds (default: {0.0})
+        open_seconds {float} -- time taken to open a file (default: {0.0})
+        options -- keyword arguments of generate_tasks
+    """
+
+    def __init__(self, startup_seconds=0.0, open_seconds=0.0, **options):
+        time.sleep(startup_seconds)
+        self.open_seconds = open_seconds
+        self.options = options
+        self.DisplayAlerts = True
+        self.ActiveProject = None
+        # (file name, read only) of the files opened, and the number of files saved (always 0 when read only)
+        self.opened = []
+        self.saved = 0
+        self.running = True
+
+    def FileOpenEx(self, Name, ReadOnly=False):
+        if not self.running:
+            raise RuntimeError("the application has quit")
+        time.sleep(self.open_seconds)
+        self.opened.append((Name, ReadOnly))
+        self.ActiveProject = _SyntheticProject(Name, generate_tasks(**self.options))
+        return True
+
+    def FileCloseEx(self, Save=0):
+        if Save:
+            self.saved += 1
+        self.ActiveProject = None
+        return True
+
+    def FileSave(self):
+        self.saved += 1
+        return True
+
+    def FieldNameToFieldConstant(self, FieldName):
+        return SyntheticTaskSource.field_constant(FieldName)
+
+    def Quit(self, SaveChanges=0):
+        self.running = False
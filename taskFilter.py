@@ -0,0 +1,88 @@
+"""Regular expression filtering of the project dataframe by column (header_to_filter / filter_text)."""
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+
+@functools.lru_cache(maxsize=1024)
+def compiled(filter_text):
+    """returns the compiled regular expression, each pattern is compiled once"""
+    return re.compile(filter_text)
+
+
+class TaskFilter(object):
+    """Selects the tasks of a project dataframe whose column matches a regular expression (re.search).
+
+    Multi value columns ("Resource Names", "Predecessors") are matched value by value, e.g. "^Bob$"
+    selects the tasks Bob is one of the resources of.  They are indexed once: an inverted index
+    from each distinct value to the rows holding it, so a query scans the distinct values rather than
+    the rows.  Categorical columns are matched on their categories.  The masks are kept, so repeating
+    a query costs nothing.
+    """
+    multi_value_headers = ("Resource Names", "Predecessors")
+    separator = ", "
+
+    def __init__(self, project_data_frame):
+        self.project_data_frame = project_data_frame
+        self.__indexes = {}
+        self.__masks = {}
+
+    def mask(self, header_to_filter, filter_text):
+        """returns a boolean array, True for the rows of the project dataframe matching filter_text in header_to_filter
+
+        Arguments:
+            header_to_filter {str or list} -- header of the column to filter, or a list of headers
+            filter_text {str or list} -- regular expression, or a list of regular expressions (one per header),
+                                         all the filters of a list have to match
+        """
+        if isinstance(header_to_filter, (list, tuple)):
+            mask = np.ones(len(self.project_data_frame), dtype=bool)
+            for header, text in zip(header_to_filter, filter_text):
+                mask &= self.mask(header, text)
+            return mask
+        key = (header_to_filter, filter_text)
+        if key not in self.__masks:
+            self.__masks[key] = self.__match(header_to_filter, compiled(filter_text))
+        return self.__masks[key]
+
+    def filter(self, header_to_filter, filter_text):
+        """returns the rows of the project dataframe matching filter_text in header_to_filter"""
+        return self.project_data_frame[self.mask(header_to_filter, filter_text)]
+
+    def __match(self, header, regex):
+        column = self.project_data_frame[header]
+        if header in self.multi_value_headers:
+            values, positions, indptr = self.index(header)
+            matched = [number for number, value in enumerate(values) if regex.search(value)]
+            mask = np.zeros(len(column), dtype=bool)
+            if matched:
+                matched = np.array(matched)
+                starts, ends = indptr[matched], indptr[matched + 1]
+                counts = ends - starts
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                mask[positions[np.repeat(starts, counts) + offsets]] = True
+            return mask
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            categories = column.cat.categories
+            matched = np.array([bool(regex.search(str(category))) for category in categories], dtype=bool)
+            codes = column.cat.codes.to_numpy()
+            if not len(categories):
+                return np.zeros(len(column), dtype=bool)
+            return np.where(codes >= 0, matched[np.maximum(codes, 0)], False)
+        return column.astype(str).str.contains(regex, na=False).to_numpy()
+
+    def index(self, header):
+        """returns the inverted index of a multi value column: (distinct values, row positions, indptr),
+        the rows holding values[i] being positions[indptr[i]:indptr[i+1]] (in row order)"""
+        if header not in self.__indexes:
+            column = self.project_data_frame[header]
+            cells = pd.Series(column.to_numpy(dtype=object), index=np.arange(len(column)))
+            tokens = cells.str.split(self.separator).explode()
+            keep = tokens.map(lambda value: isinstance(value, str) and value != "").to_numpy(dtype=bool)
+            codes, values = pd.factorize(tokens.to_numpy(dtype=object)[keep])
+            order = np.argsort(codes, kind="stable")
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(values)))))
+            self.__indexes[header] = (np.asarray(values, dtype=object), tokens.index.to_numpy()[keep][order], indptr)
+        return self.__indexes[header]
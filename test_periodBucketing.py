@@ -0,0 +1,68 @@
+"""PeriodBuckets against the period loop the FINISHING and WIP reports used before it (one set of masks per
+period, the WIP labels set with .ix, here .loc), on synthetic task sources.
+
+    python -m pytest -q
+"""
+import collections
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+from ProjectToExcelClasses import DataFrameOfMSProject
+from periodBucketing import PeriodBuckets
+from syntheticProject import SyntheticTaskSource
+
+
+def _finishing_loop(df_filtered, due_date, duration_of_periods, num_of_periods):
+    data_frame_collection = collections.OrderedDict()
+    data_frame_collection["Overdue"] = df_filtered[df_filtered["Finish"] <= pd.Timestamp(due_date)]
+    date = due_date + dt.timedelta(days=1)
+    for reportingWindow in range(0, num_of_periods):
+        from_date = date
+        to_date = date + dt.timedelta(days=duration_of_periods-1)
+        key = str(from_date) + "<>" + str(to_date)
+        data_frame_collection[key] = df_filtered[(df_filtered["Finish"] >= pd.Timestamp(from_date)) &
+                                                 (df_filtered["Finish"] <= pd.Timestamp(to_date))]
+        date = to_date + dt.timedelta(days=1)
+    return data_frame_collection
+
+
+def _wip_loop(df_filtered, due_date, duration_of_periods, num_of_periods):
+    data_frame_collection = collections.OrderedDict()
+    data_frame_collection["Overdue"] = df_filtered[df_filtered["Finish"] <= pd.Timestamp(due_date)]
+    date = due_date + dt.timedelta(days=1)
+    for reportingWindow in range(0, num_of_periods):
+        from_date = date
+        to_date = date + dt.timedelta(days=duration_of_periods-1)
+        key = str(from_date) + "<>" + str(to_date)
+        date = to_date + dt.timedelta(days=1)
+        from_date, to_date = pd.Timestamp(from_date), pd.Timestamp(to_date)
+        df_temp = df_filtered.copy(deep=True)
+        df_temp = df_temp[((df_temp["Start"] >= from_date) & (df_temp["Start"] <= to_date) & (df_temp["Finish"] >= from_date)) |
+                          ((df_temp["Start"] <= from_date) & (df_temp["Finish"] >= to_date) & (df_temp["Finish"] >= to_date) & (df_temp["Start"] <= to_date)) |
+                          ((df_temp["Start"] <= from_date) & (df_temp["Finish"] >= from_date) & (df_temp["Finish"] <= to_date) & (df_temp["Start"] <= to_date))]
+        df_temp["WIP"] = "WIP"
+        df_temp.loc[df_temp["Start"] >= from_date, "WIP"] = "Starting in Period"
+        df_temp.loc[df_temp["Finish"] < to_date, "WIP"] = "Finishing in Period"
+        df_temp.loc[(df_temp["Start"] >= from_date) & (df_temp["Finish"] <= to_date), "WIP"] = "Starting & Finishing in Period"
+        data_frame_collection[key] = df_temp.copy(deep=True)
+    return data_frame_collection
+
+
+@pytest.fixture(scope="module")
+def tasks():
+    project = DataFrameOfMSProject(task_source=SyntheticTaskSource(num_of_tasks=2000, max_duration_days=40, seed=7))
+    return project.filter_tasks()
+
+
+@pytest.mark.parametrize("due_date, duration_of_periods, num_of_periods",
+                         [(dt.date(2018, 6, 1), 7, 5), (dt.date(2018, 3, 15), 1, 10), (dt.date(2018, 9, 30), 30, 3)])
+def test_period_buckets_match_the_period_loop(tasks, due_date, duration_of_periods, num_of_periods):
+    buckets = PeriodBuckets(due_date, duration_of_periods, num_of_periods)
+    for bucketed, expected in ((buckets.finishing(tasks), _finishing_loop(tasks, due_date, duration_of_periods, num_of_periods)),
+                               (buckets.wip(tasks), _wip_loop(tasks, due_date, duration_of_periods, num_of_periods))):
+        assert list(bucketed) == list(expected)
+        assert sum(len(frame) for frame in expected.values()) > 0
+        for key in expected:
+            pd.testing.assert_frame_equal(bucketed[key], expected[key], check_categorical=False)
@@ -0,0 +1,61 @@
+"""DataFrameOfPortfolio on synthetic task sources: a file failing to extract must not stop the others,
+and the categorical columns of the projects stay categorical in the portfolio.
+
+    python -m pytest -q
+"""
+import pandas as pd
+
+from ProjectToExcelClasses import DataFrameOfMSProject
+from projectPortfolio import DataFrameOfPortfolio
+from syntheticProject import SyntheticTaskSource
+
+
+class _NoNotesTaskSource(SyntheticTaskSource):
+    """a project without a Notes field, so the headers asked for are not valid"""
+
+    @staticmethod
+    def field_constant(field_name):
+        if field_name == "Notes":
+            raise ValueError("Notes is not a field of this project")
+        return SyntheticTaskSource.field_constant(field_name)
+
+
+class _UnreadableTaskSource(SyntheticTaskSource):
+    def open(self):
+        raise OSError("the project file is locked")
+
+
+def task_source_factory(project_file):
+    """module level, so it can be sent to the worker processes"""
+    if project_file == "invalid_headers.mpp":
+        return _NoNotesTaskSource(num_of_tasks=20)
+    if project_file == "unreadable.mpp":
+        return _UnreadableTaskSource(num_of_tasks=20)
+    return SyntheticTaskSource(num_of_tasks=50, seed=len(project_file))
+
+
+def test_failing_files_do_not_stop_the_others():
+    project_files = ["good.mpp", "invalid_headers.mpp", "unreadable.mpp"]
+    portfolio = DataFrameOfPortfolio(project_files, headers=["Notes"], max_workers=2,
+                                     task_source_factory=task_source_factory)
+
+    assert sorted(portfolio.errors) == ["invalid_headers.mpp", "unreadable.mpp"]
+    assert portfolio.errors["invalid_headers.mpp"] == "headers invalid / not a project file"
+    assert "the project file is locked" in portfolio.errors["unreadable.mpp"]
+    frame = portfolio.project_data_frame
+    assert list(frame.index.get_level_values("Project").unique()) == ["good.mpp"]
+    assert len(frame) == 50
+    assert "Notes" in frame.columns
+
+
+def test_categorical_columns_stay_categorical():
+    project_files = ["first.mpp", "second project.mpp"]
+    portfolio = DataFrameOfPortfolio(project_files, max_workers=2, task_source_factory=task_source_factory)
+
+    frame = portfolio.project_data_frame
+    assert len(frame) == 100
+    for column in ("SummaryTask", "Resource Names"):
+        assert isinstance(frame[column].dtype, pd.CategoricalDtype)
+        extracted = [DataFrameOfMSProject(task_source=task_source_factory(f)).project_data_frame[column]
+                     for f in project_files]
+        assert list(frame[column].astype(object)) == [v for values in extracted for v in values.astype(object)]
@@ -0,0 +1,167 @@
+"""Writes the dictionaries of DataFrames output by DataFrameOfMSProject straight to a formatted .xlsx file,
+without Excel, so no second formatting pass through Excel.Application is needed."""
+import pathlib
+import re
+
+import pandas as pd
+import xlsxwriter
+import xlsxwriter.utility
+
+from formatExcel import excelFormatColumns
+
+
+class excelReportWriter(excelFormatColumns):
+    """Same column formatting settings as excelFormatColumns (date_cols, date_format, autofit_cols,
+    wrap_text_cols_ColWidth_small/medium/large and colWidths), applied while each sheet is written.
+    Columns are given as in Excel, e.g. "D", "D:F" or 4 (column D), with column A holding the index (UniqueID).
+
+    The workbook is written in xlsxwriter's constant memory mode, each row is flushed to disk once written.
+    """
+    # number format of date columns not listed in date_cols (as written by DataFrame.to_excel)
+    datetime_format = "yyyy-mm-dd hh:mm:ss"
+    # number format of the (0-100) percentage columns, shown as in MS Project e.g. 50%
+    percent_format = '0"%"'
+    percent_headers = ("% Complete",)
+
+    def __init__(self):
+        #create directory for log files if one does not exist
+        pathlib.Path('log').mkdir(parents=True, exist_ok=True)
+        super().__init__()
+        self.zoom = 60
+
+    def writeExcel(self, xlPath, dictionary_of_data_frames):
+        """writes one sheet per DataFrame, named by its dictionary key, in the order of the dictionary
+
+        Arguments:
+            xlPath {str} -- full path of the .xlsx file to write
+            dictionary_of_data_frames {OrderedDict} -- e.g. as returned by output_dictionary_of_data_frames_WIP
+        """
+        self.logger.info("%s", xlPath)
+        with self.metrics.phase("excel write"):
+            wb = xlsxwriter.Workbook(xlPath, {"constant_memory": True, "nan_inf_to_errors": True})
+            writer = self.open_sheets(wb, dictionary_of_data_frames)
+            for sheet, frame in dictionary_of_data_frames.items():
+                writer.append(sheet, frame)
+            wb.close()
+        self.metrics.count("workbooks written")
+        return
+
+    def writeExcelBatches(self, xlPath, dictionaries_of_data_frames):
+        """writes an iterable of dictionaries of DataFrames (e.g. DataFrameOfMSProject.iter_report_batches) as
+        writeExcel writes their concatenation, one dictionary at a time, so only one is held in memory.
+        The sheets and their formats (e.g. autofit widths) are set up from the first dictionary.
+
+        Arguments:
+            xlPath {str} -- full path of the .xlsx file to write
+            dictionaries_of_data_frames {iterable} -- dictionaries with the same keys, as output_dictionary_of_data_frames_WIP
+        """
+        self.logger.info("%s", xlPath)
+        wb = xlsxwriter.Workbook(xlPath, {"constant_memory": True, "nan_inf_to_errors": True})
+        writer = None
+        for dictionary_of_data_frames in dictionaries_of_data_frames:
+            # only the writing is timed, not producing the dictionaries
+            with self.metrics.phase("excel write"):
+                if writer is None:
+                    writer = self.open_sheets(wb, dictionary_of_data_frames)
+                for sheet, frame in dictionary_of_data_frames.items():
+                    writer.append(sheet, frame)
+        with self.metrics.phase("excel write"):
+            wb.close()
+        self.metrics.count("workbooks written")
+        return
+
+    def open_sheets(self, wb, dictionary_of_data_frames):
+        """adds the formatted (empty) sheets to workbook wb, returns a _SheetWriter appending rows to them,
+        dictionary_of_data_frames only needs to hold a DataFrame (or an empty DataFrame with the columns) per sheet"""
+        return _SheetWriter(self, wb, dictionary_of_data_frames)
+
+    def column_formats(self, wb, frame):
+        """returns a list of (width, xlsxwriter format) for the columns of frame as written (index first)"""
+        dtypes = _index_dtypes(frame) + list(frame.dtypes)
+        names = list(frame.index.names) + list(frame.columns)
+        settings = [{"valign": "top"} for dtype in dtypes]
+        widths = [None] * len(settings)
+        for col, dtype in enumerate(dtypes):
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                settings[col]["num_format"] = self.datetime_format
+            elif names[col] in self.percent_headers and pd.api.types.is_integer_dtype(dtype):
+                settings[col]["num_format"] = self.percent_format
+        for col in self._columns(self.date_cols, len(settings)):
+            settings[col]["num_format"] = self.date_format
+        for col in self._columns(self.autofit_cols, len(settings)):
+            widths[col] = _autofit_width(frame, col)
+        for width, cols in zip(self.colWidths, (self.wrap_text_cols_ColWidth_small,
+                                                self.wrap_text_cols_ColWidth_medium,
+                                                self.wrap_text_cols_ColWidth_large)):
+            for col in self._columns(cols, len(settings)):
+                widths[col] = width
+                settings[col]["text_wrap"] = True
+        return [(widths[col], wb.add_format(settings[col])) for col in range(len(settings))]
+
+    @staticmethod
+    def _columns(colList, num_of_columns):
+        """yields the 0 based column numbers of a list of Excel columns ("D", "D:F" or 4) within the first num_of_columns"""
+        for col in colList:
+            if isinstance(col, int):
+                first_col = last_col = col - 1
+            else:
+                first, _, last = str(col).partition(":")
+                first_col = xlsxwriter.utility.xl_cell_to_rowcol(first + "1")[1]
+                last_col = xlsxwriter.utility.xl_cell_to_rowcol((last or first) + "1")[1]
+            for c in range(first_col, min(last_col + 1, num_of_columns)):
+                yield c
+
+
+class _SheetWriter(object):
+    """appends rows to the sheets of a constant memory workbook"""
+
+    def __init__(self, report_writer, wb, dictionary_of_data_frames):
+        self.__metrics = report_writer.metrics
+        self.__sheets = {}
+        header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        for sheet, frame in dictionary_of_data_frames.items():
+            ws = wb.add_worksheet(_sheet_name(sheet))
+            ws.set_zoom(report_writer.zoom)
+            formats = report_writer.column_formats(wb, frame)
+            for col, (width, cell_format) in enumerate(formats):
+                ws.set_column(col, col, width, cell_format)
+            for col, name in enumerate(list(frame.index.names) + list(frame.columns)):
+                ws.write_string(0, col, "" if name is None else str(name), header_format)
+            self.__sheets[sheet] = [ws, [cell_format for width, cell_format in formats], 1]
+        self.__metrics.count("sheets written", len(self.__sheets))
+
+    def append(self, sheet, frame):
+        """writes the rows of frame below the rows already written to sheet"""
+        ws, formats, row = self.__sheets[sheet]
+        columns = [frame.index.get_level_values(level).tolist() for level in range(frame.index.nlevels)]
+        columns += [frame[col].tolist() for col in frame.columns]
+        for values in zip(*columns):
+            for col, value in enumerate(values):
+                if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+                    ws.write_blank(row, col, None, formats[col])
+                else:
+                    ws.write(row, col, value, formats[col])
+            row += 1
+        self.__metrics.count("rows written", row - self.__sheets[sheet][2])
+        self.__sheets[sheet][2] = row
+
+
+def _sheet_name(key):
+    """Excel sheet names are at most 31 characters long and can not contain []:*?/\\"""
+    return re.sub(r"[\[\]:*?/\\]", "_", str(key))[:31]
+
+
+def _index_dtypes(frame):
+    return [frame.index.get_level_values(level).dtype for level in range(frame.index.nlevels)]
+
+
+def _autofit_width(frame, col):
+    """width of the longest value (or header) of column number col as written"""
+    if col < frame.index.nlevels:
+        values = frame.index.get_level_values(col).to_series()
+        header = frame.index.names[col]
+    else:
+        header = frame.columns[col - frame.index.nlevels]
+        values = frame[header]
+    longest = values.astype(str).str.len().max() if len(values) else 0
+    return min(max(longest, len(str(header))) + 2, 100)